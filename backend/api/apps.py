@@ -1,6 +1,17 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        import api.metrics  # noqa: F401
+        from api.profiling import install_query_profiler, instrument
+
+        from backend.settings import SERVER_TIMING_DETAILED
+
+        if SERVER_TIMING_DETAILED:
+            instrument()
+        connection_created.connect(install_query_profiler)
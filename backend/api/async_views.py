@@ -0,0 +1,58 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import update_wrapper
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+
+from backend.settings import ASYNC_VIEW_THREADS
+
+executor = None
+if ASYNC_VIEW_THREADS:
+    executor = ThreadPoolExecutor(
+        max_workers=ASYNC_VIEW_THREADS,
+        thread_name_prefix='api-read',
+    )
+
+
+def run_view(view, request, *args, **kwargs):
+    """Выполняет синхронное представление целиком в потоке пула.
+
+    Ответ рендерится здесь же, иначе Django отрендерит его в общем
+    потоке для синхронного кода. Соединения с базой у каждого потока
+    свои, поэтому закрываются по тем же правилам, что и после запроса.
+    """
+    close_old_connections()
+    try:
+        response = view(request, *args, **kwargs)
+        if hasattr(response, 'render') and callable(response.render):
+            response.render()
+        return response
+    finally:
+        close_old_connections()
+
+
+def async_view(view):
+    """Асинхронная обёртка: под ASGI запрос не занимает цикл событий.
+
+    При ASYNC_VIEW_THREADS = 0 представление выполняется в общем потоке
+    для синхронного кода, как обычные синхронные представления.
+    """
+    async def wrapper(request, *args, **kwargs):
+        if executor is None:
+            run = sync_to_async(run_view, thread_sensitive=True)
+        else:
+            run = sync_to_async(
+                run_view, thread_sensitive=False, executor=executor
+            )
+        return await run(view, request, *args, **kwargs)
+
+    update_wrapper(wrapper, view)
+    return wrapper
+
+
+def async_routes(urls, names):
+    """Делает асинхронными маршруты роутера с указанными именами."""
+    for url in urls:
+        if url.name in names:
+            url.callback = async_view(url.callback)
+    return urls
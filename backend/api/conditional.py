@@ -0,0 +1,78 @@
+from calendar import timegm
+from hashlib import md5
+
+from api.serializers import UsersSerializer, get_subscribed_ids
+from django.utils.cache import (get_conditional_response, patch_cache_control,
+                                patch_vary_headers)
+from django.utils.http import http_date
+from recipes.cache import tag_cache
+from recipes.ingredient_index import ingredient_index
+
+AUTHOR_FIELDS = tuple(
+    field for field in UsersSerializer.Meta.fields
+    if field not in ('is_subscribed', 'password')
+)
+
+
+def get_author_state(recipe):
+    if recipe.author_id is None:
+        return None
+    return tuple(getattr(recipe.author, field) for field in AUTHOR_FIELDS)
+
+
+def get_recipe_etag(request, recipes, *extra):
+    """ETag для рецептов.
+
+    Учитывает версии рецептов, поля автора, которые видит клиент,
+    версии справочников тегов и ингредиентов и флаги, зависящие от
+    пользователя.
+    """
+    subscribed_ids = get_subscribed_ids(request)
+    state = [
+        request.user.pk,
+        tag_cache.get_version(),
+        ingredient_index.get_version(),
+        *extra,
+    ]
+    for recipe in recipes:
+        state.append((
+            recipe.pk,
+            recipe.updated_at.isoformat(),
+            recipe.is_favorited,
+            recipe.is_in_shopping_cart,
+            recipe.author_id in subscribed_ids,
+            get_author_state(recipe),
+        ))
+    return f'"{md5(repr(state).encode()).hexdigest()}"'
+
+
+def get_recipe_last_modified(request, recipe):
+    """Last-Modified для одного рецепта.
+
+    Отдаётся только анонимам: изменение избранного или подписок не
+    меняет updated_at. Для списков не отдаётся совсем, потому что
+    удаление рецепта или сдвиг страницы не меняют максимальный
+    updated_at.
+    """
+    if request.user.is_authenticated:
+        return None
+    return timegm(recipe.updated_at.utctimetuple())
+
+
+def not_modified_response(request, etag, last_modified):
+    """Ответ 304, если клиент уже получил актуальное представление."""
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    patch_vary_headers(response, ('Authorization',))
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
@@ -1,4 +1,5 @@
 from django_filters.rest_framework import FilterSet, filters
+from recipes.cache import tag_cache
 from recipes.models import Ingredient, Recipe
 from users.models import User
 
@@ -17,6 +18,10 @@ IN_NOT_IN = (
 )
 
 
+def tag_choices():
+    return [(tag['slug'], tag['name']) for tag in tag_cache.get()]
+
+
 class RecipeFilter(FilterSet):
 
     author = filters.ModelChoiceFilter(
@@ -29,23 +34,26 @@ class RecipeFilter(FilterSet):
         choices=IN_NOT_IN,
         method='get_is_in'
     )
-    tags = filters.AllValuesMultipleFilter(
+    tags = filters.MultipleChoiceFilter(
         field_name='tags__slug',
+        choices=tag_choices,
         label='Ссылка'
     )
+    search = filters.CharFilter(
+        method='search_recipes',
+        label='Поиск'
+    )
 
     def get_is_in(self, queryset, name, value):
-        user = self.request.user
-        if user.is_authenticated:
-            if value == '1':
-                if name == 'is_favorited':
-                    queryset = queryset.filter(recipe_in_favorites__user=user)
-                if name == 'is_in_shopping_cart':
-                    queryset = queryset.filter(
-                        recipe_shopping_cart__user=user
-                    )
+        if self.request.user.is_authenticated and value == '1':
+            return queryset.filter(**{name: True})
         return queryset
 
+    def search_recipes(self, queryset, name, value):
+        return queryset.search(value)
+
     class Meta:
         model = Recipe
-        fields = ['is_favorited', 'is_in_shopping_cart', 'author', 'tags']
+        fields = [
+            'is_favorited', 'is_in_shopping_cart', 'author', 'tags', 'search'
+        ]
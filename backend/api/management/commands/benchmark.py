@@ -0,0 +1,192 @@
+import json
+import platform
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from urllib.parse import urlencode
+
+import django
+from api.profiling import request_profiled
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+from django.test import Client
+from recipes.models import Ingredient, Recipe, ShoppingCart, Tag
+from rest_framework.authtoken.models import Token
+from users.models import Subscribe
+
+from backend.settings import BENCHMARK_CONCURRENCY, BENCHMARK_REQUESTS
+
+
+def percentile(values, share):
+    index = max(0, min(len(values) - 1, round(share * len(values)) - 1))
+    return values[index]
+
+
+class Command(BaseCommand):
+    help = 'Нагрузочный тест основных маршрутов API через тестовый клиент'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests', type=int, default=BENCHMARK_REQUESTS,
+            help='число обращений к каждому сценарию'
+        )
+        parser.add_argument(
+            '--concurrency', type=int, default=BENCHMARK_CONCURRENCY
+        )
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument(
+            '--scenario', action='append',
+            help='запустить только указанные сценарии'
+        )
+        parser.add_argument('--output', default='benchmark.json')
+        parser.add_argument(
+            '--compare', help='предыдущий отчёт для сравнения'
+        )
+
+    def get_scenarios(self):
+        user_id = ShoppingCart.objects.values_list(
+            'user_id', flat=True
+        ).order_by('user_id').first() or Subscribe.objects.values_list(
+            'user_id', flat=True
+        ).order_by('user_id').first()
+        if user_id is None:
+            raise CommandError(
+                'Нет данных для теста, сначала запустите generate_data'
+            )
+        self.token = Token.objects.get_or_create(user_id=user_id)[0].key
+        recipe = Recipe.objects.order_by('-pk').values_list(
+            'pk', flat=True
+        ).first()
+        tag = Tag.objects.values_list('slug', flat=True).first()
+        ingredient = Ingredient.objects.values_list(
+            'name', flat=True
+        ).first() or 'а'
+        return {
+            'recipes_list': '/api/recipes/',
+            'recipes_filtered': (
+                f'/api/recipes/?tags={tag}&is_favorited=1&limit=6'
+            ),
+            'recipes_search': '/api/recipes/?' + urlencode({'search': 'суп'}),
+            'recipes_cursor': '/api/recipes/?cursor=',
+            'recipe_detail': f'/api/recipes/{recipe}/',
+            'download_shopping_cart':
+                '/api/recipes/download_shopping_cart/',
+            'download_shopping_cart_pdf':
+                '/api/recipes/download_shopping_cart/?format=pdf',
+            'users_subscriptions': '/api/users/subscriptions/',
+            'ingredients_search': '/api/ingredients/?' + urlencode(
+                {'name': ingredient[:3]}
+            ),
+        }
+
+    def request(self, url):
+        client = getattr(self.local, 'client', None)
+        if client is None:
+            client = self.local.client = Client(
+                HTTP_AUTHORIZATION=f'Token {self.token}'
+            )
+        self.local.profile = None
+        started = time.perf_counter()
+        try:
+            response = client.get(url)
+            if response.streaming:
+                b''.join(response.streaming_content)
+            elapsed = time.perf_counter() - started
+        finally:
+            close_old_connections()
+        profile = self.local.profile
+        return (
+            elapsed, profile.queries, response.status_code,
+            profile.durations.get('db', 0) * 1000,
+        )
+
+    def store_profile(self, profile, **kwargs):
+        """Запоминает профиль запроса в потоке, который его выполнил.
+
+        Для потоковых ответов сигнал приходит после того, как тело
+        дочитано, поэтому учитываются и запросы, сделанные при отдаче.
+        """
+        self.local.profile = profile
+
+    def run_scenario(self, url, options):
+        with ThreadPoolExecutor(options['concurrency']) as executor:
+            list(executor.map(self.request, [url] * options['warmup']))
+            started = time.perf_counter()
+            results = list(executor.map(
+                self.request, [url] * options['requests']
+            ))
+            elapsed = time.perf_counter() - started
+        latencies = sorted(result[0] * 1000 for result in results)
+        return {
+            'url': url,
+            'requests': len(results),
+            'errors': sum(result[2] >= 400 for result in results),
+            'p50_ms': round(percentile(latencies, 0.50), 2),
+            'p95_ms': round(percentile(latencies, 0.95), 2),
+            'p99_ms': round(percentile(latencies, 0.99), 2),
+            'mean_ms': round(sum(latencies) / len(latencies), 2),
+            'throughput_rps': round(len(results) / elapsed, 1),
+            'queries_per_request': round(
+                sum(result[1] for result in results) / len(results), 1
+            ),
+            'db_ms': round(
+                sum(result[3] for result in results) / len(results), 2
+            ),
+        }
+
+    def compare(self, path, scenarios):
+        with open(path, encoding='utf-8') as file:
+            previous = json.load(file)['scenarios']
+        for name, result in scenarios.items():
+            if name not in previous:
+                continue
+            before = previous[name]
+            self.stdout.write(
+                f'{name}: p95 {before["p95_ms"]} -> {result["p95_ms"]} мс, '
+                f'{before["throughput_rps"]} -> {result["throughput_rps"]} '
+                f'rps, запросов к БД {before["queries_per_request"]} -> '
+                f'{result["queries_per_request"]}'
+            )
+
+    def handle(self, *args, **options):
+        self.local = threading.local()
+        request_profiled.connect(self.store_profile)
+        scenarios = self.get_scenarios()
+        if options['scenario']:
+            unknown = set(options['scenario']) - scenarios.keys()
+            if unknown:
+                raise CommandError(f'Неизвестные сценарии: {unknown}')
+            scenarios = {
+                name: url for name, url in scenarios.items()
+                if name in options['scenario']
+            }
+        results = {}
+        for name, url in scenarios.items():
+            results[name] = self.run_scenario(url, options)
+            result = results[name]
+            self.stdout.write(
+                f'{name}: p50 {result["p50_ms"]} мс, p95 {result["p95_ms"]} '
+                f'мс, p99 {result["p99_ms"]} мс, '
+                f'{result["throughput_rps"]} rps, '
+                f'{result["queries_per_request"]} запросов к БД, '
+                f'ошибок {result["errors"]}'
+            )
+        report = {
+            'meta': {
+                'started_at': datetime.now(timezone.utc).isoformat(),
+                'database': connection.vendor,
+                'django': django.get_version(),
+                'python': platform.python_version(),
+                'concurrency': options['concurrency'],
+                'recipes': Recipe.objects.count(),
+            },
+            'scenarios': results,
+        }
+        with open(options['output'], 'w', encoding='utf-8') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+        if options['compare']:
+            self.compare(options['compare'], results)
+        self.stdout.write(self.style.SUCCESS(
+            f'Отчёт сохранён в {options["output"]}'
+        ))
@@ -0,0 +1,73 @@
+import os
+
+from api.profiling import request_profiled
+from django.dispatch import receiver
+from django.http import HttpResponse
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY,
+                               CollectorRegistry, Counter, Histogram,
+                               generate_latest, multiprocess)
+
+from backend.settings import (METRICS_DURATION_BUCKETS,
+                              METRICS_QUERIES_BUCKETS, METRICS_SIZE_BUCKETS)
+
+LABELS = ('route', 'method')
+
+# Остальные методы попадают в метку other, чтобы произвольные
+# значения из запроса не порождали новые ряды.
+METHODS = ('GET', 'POST', 'PUT', 'PATCH', 'DELETE', 'HEAD', 'OPTIONS')
+
+REQUEST_DURATION = Histogram(
+    'http_request_duration_seconds', 'Время обработки запроса',
+    LABELS, buckets=METRICS_DURATION_BUCKETS,
+)
+REQUESTS = Counter(
+    'http_requests', 'Число запросов по кодам ответа',
+    LABELS + ('status',),
+)
+REQUEST_QUERIES = Histogram(
+    'http_request_db_queries', 'Число запросов к базе на один запрос',
+    LABELS, buckets=METRICS_QUERIES_BUCKETS,
+)
+RESPONSE_SIZE = Histogram(
+    'http_response_size_bytes', 'Размер тела ответа',
+    LABELS, buckets=METRICS_SIZE_BUCKETS,
+)
+
+
+def get_route(request):
+    """Имя маршрута, например recipes-list или admin:index."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.view_name
+
+
+def get_method(request):
+    return request.method if request.method in METHODS else 'other'
+
+
+@receiver(request_profiled)
+def record_request_metrics(request, response, profile, **kwargs):
+    """Записывает метрики запроса по профилю ServerTimingMiddleware.
+
+    Профиль закрывается после отдачи потокового ответа, поэтому время,
+    запросы к базе и размер учитывают и генерацию тела. Под gunicorn
+    с несколькими процессами значения пишутся в файлы каталога
+    PROMETHEUS_MULTIPROC_DIR и складываются при отдаче метрик.
+    """
+    labels = (get_route(request), get_method(request))
+    REQUEST_DURATION.labels(*labels).observe(profile.duration)
+    REQUESTS.labels(*labels, response.status_code).inc()
+    REQUEST_QUERIES.labels(*labels).observe(profile.queries)
+    RESPONSE_SIZE.labels(*labels).observe(profile.response_size)
+
+
+def metrics(request):
+    """Метрики всех процессов в текстовом формате Prometheus."""
+    registry = REGISTRY
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return HttpResponse(
+        generate_latest(registry), content_type=CONTENT_TYPE_LATEST
+    )
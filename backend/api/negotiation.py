@@ -0,0 +1,15 @@
+from rest_framework.exceptions import NotAcceptable
+from rest_framework.negotiation import DefaultContentNegotiation
+
+
+class FallbackContentNegotiation(DefaultContentNegotiation):
+    """Отдаёт первый рендерер, если заголовок Accept ему не подходит.
+
+    Явно запрошенный неизвестный ?format= по-прежнему даёт 404.
+    """
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        try:
+            return super().select_renderer(request, renderers, format_suffix)
+        except NotAcceptable:
+            return renderers[0], renderers[0].media_type
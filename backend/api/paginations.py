@@ -1,7 +1,212 @@
-from rest_framework.pagination import PageNumberPagination
-
-
-class RecipePagination(PageNumberPagination):
-    """Паджинация рецептов."""
-    page_size = 6
-    page_size_query_param = 'limit'
+import base64
+import json
+from collections import OrderedDict
+from datetime import datetime
+from hashlib import md5
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from backend.settings import COUNT_CACHE_TIMEOUT, COUNT_ESTIMATE_THRESHOLD
+
+
+def estimate_count(queryset):
+    """Оценка числа строк таблицы по статистике планировщика PostgreSQL.
+
+    Возвращает None для запросов с условиями, других СУБД и небольших
+    таблиц, для которых точный подсчёт дёшев.
+    """
+    query = queryset.query
+    connection = connections[queryset.db]
+    if (connection.vendor != 'postgresql' or query.where or query.distinct
+            or query.combinator):
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples FROM pg_class WHERE oid = %s::regclass',
+            [queryset.model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    if row is None or row[0] < COUNT_ESTIMATE_THRESHOLD:
+        return None
+    return int(row[0])
+
+
+class CachedCountPaginator(Paginator):
+    """Paginator, который не считает COUNT(*) на каждый запрос.
+
+    Для больших таблиц без фильтров берётся оценка планировщика, остальные
+    результаты подсчёта кэшируются по тексту SQL-запроса на короткое время.
+    """
+    count_exact = True
+
+    @cached_property
+    def count(self):
+        if not hasattr(self.object_list, 'query'):
+            return len(self.object_list)
+        estimate = estimate_count(self.object_list)
+        if estimate is not None:
+            self.count_exact = False
+            return estimate
+        key = 'count:' + md5(
+            str(self.object_list.query).encode()
+        ).hexdigest()
+        count = cache.get(key)
+        if count is None:
+            count = self.object_list.count()
+            cache.set(key, count, COUNT_CACHE_TIMEOUT)
+        return count
+
+
+class KeysetPagination(BasePagination):
+    """Паджинация по ключу сортировки (поле, id) без OFFSET и COUNT.
+
+    Курсор хранит значения ключа крайнего объекта страницы, поэтому
+    глубокие страницы выбираются так же быстро, как первая, а новые
+    записи не сдвигают выдачу.
+    """
+    cursor_query_param = 'cursor'
+    page_size = 6
+    page_size_query_param = 'limit'
+    max_page_size = 100
+    ordering = ('-pub_date', '-id')
+    invalid_cursor_message = 'Неверный курсор.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.ordering = getattr(view, 'cursor_ordering', self.ordering)
+        page_size = self.get_page_size(request)
+        position, reverse = self.decode_cursor(request)
+        descending = self.ordering[0].startswith('-')
+        fields = [field.lstrip('-') for field in self.ordering]
+        if descending == reverse:
+            ordering, lookup = fields, 'gt'
+        else:
+            ordering, lookup = [f'-{field}' for field in fields], 'lt'
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            (field, key_field), (value, key) = fields, self.parse_position(
+                queryset.model, fields, position
+            )
+            queryset = queryset.filter(
+                Q(**{f'{field}__{lookup}': value})
+                | Q(**{field: value, f'{key_field}__{lookup}': key})
+            )
+        page = list(queryset[:page_size + 1])
+        has_more = len(page) > page_size
+        page = page[:page_size]
+        if reverse:
+            page.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        self.page = page
+        return page
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(page_size, 1), self.max_page_size)
+
+    def get_position(self, obj):
+        position = []
+        for field in self.ordering:
+            value = getattr(obj, field.lstrip('-'))
+            if isinstance(value, datetime):
+                value = value.isoformat()
+            position.append(value)
+        return position
+
+    def encode_cursor(self, position, reverse):
+        token = json.dumps({'p': position, 'r': int(reverse)})
+        token = base64.urlsafe_b64encode(token.encode()).decode()
+        return replace_query_param(
+            self.request.build_absolute_uri(), self.cursor_query_param, token
+        )
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None, False
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(token.encode()))
+            position, reverse = cursor['p'], bool(cursor['r'])
+            if not isinstance(position, list) or len(position) != 2:
+                raise ValueError
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def parse_position(self, model, fields, position):
+        """Приводит значения курсора к типам полей модели."""
+        values = []
+        for field, value in zip(fields, position):
+            if value is None or isinstance(value, (dict, list)):
+                raise NotFound(self.invalid_cursor_message)
+            try:
+                values.append(model._meta.get_field(field).to_python(value))
+            except (ValidationError, TypeError, ValueError):
+                raise NotFound(self.invalid_cursor_message)
+        return values
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.get_position(self.page[-1]), False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.get_position(self.page[0]), True)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+
+class RecipePagination(PageNumberPagination):
+    """Паджинация рецептов.
+
+    Параметр cursor (для первой страницы — пустой ?cursor=) включает
+    паджинацию по ключу вместо номеров страниц. Поле count_exact ответа
+    показывает, посчитано ли количество точно или взято из оценки.
+    """
+    page_size = 6
+    page_size_query_param = 'limit'
+    django_paginator_class = CachedCountPaginator
+    cursor_pagination_class = KeysetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        if self.cursor_pagination_class.cursor_query_param in (
+            request.query_params
+        ):
+            self.cursor_paginator = self.cursor_pagination_class()
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view
+            )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return Response(OrderedDict([
+            ('count', self.page.paginator.count),
+            ('count_exact', self.page.paginator.count_exact),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
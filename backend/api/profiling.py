@@ -0,0 +1,219 @@
+import asyncio
+import json
+import logging
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.dispatch import Signal
+from rest_framework import serializers
+from rest_framework.response import Response
+
+from backend.settings import SERVER_TIMING_HEADER, SERVER_TIMING_LOG
+
+logger = logging.getLogger(__name__)
+
+current_profile = ContextVar('current_profile', default=None)
+
+# Свойства DRF, время которых попадает в serialize и render.
+INSTRUMENTED = (
+    (serializers.Serializer, 'data', 'serialize'),
+    (serializers.ListSerializer, 'data', 'serialize'),
+    (Response, 'rendered_content', 'render'),
+)
+original_properties = {}
+
+# Отправляется, когда запрос полностью обработан, для потоковых ответов —
+# после того, как тело отдано клиенту. Аргументы: request, response,
+# profile.
+request_profiled = Signal()
+
+
+class RequestProfile:
+    """Время, потраченное запросом на SQL, сериализацию и рендеринг."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.view_duration = None
+        self.duration = None
+        self.queries = 0
+        self.durations = defaultdict(float)
+        self.active = set()
+        self.response_size = 0
+
+    @contextmanager
+    def measure(self, name):
+        # Вложенные замеры одного вида, например сериализатор внутри
+        # SerializerMethodField, не считаются повторно.
+        if name in self.active:
+            yield
+            return
+        self.active.add(name)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.durations[name] += time.perf_counter() - started
+            self.active.discard(name)
+
+
+@contextmanager
+def measure(name):
+    profile = current_profile.get()
+    if profile is None:
+        yield
+        return
+    with profile.measure(name):
+        yield
+
+
+def profile_queries(execute, sql, params, many, context):
+    profile = current_profile.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    profile.queries += 1
+    with profile.measure('db'):
+        return execute(sql, params, many, context)
+
+
+def install_query_profiler(sender, connection, **kwargs):
+    """Подключает замер SQL к каждому новому соединению с базой.
+
+    Соединения у каждого потока свои, в том числе у пула асинхронных
+    представлений; профиль запроса попадает туда через contextvar.
+    """
+    if profile_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(profile_queries)
+
+
+def timed_property(prop, name):
+    def getter(self):
+        with measure(name):
+            return prop.fget(self)
+
+    return property(getter, doc=prop.__doc__)
+
+
+def instrument():
+    """Оборачивает точки DRF, в которых идёт сериализация и рендеринг.
+
+    Подмена действует на весь процесс, поэтому включается только при
+    SERVER_TIMING_DETAILED; повторный вызов ничего не меняет.
+    """
+    for owner, attribute, name in INSTRUMENTED:
+        if (owner, attribute) in original_properties:
+            continue
+        prop = owner.__dict__[attribute]
+        original_properties[owner, attribute] = prop
+        setattr(owner, attribute, timed_property(prop, name))
+
+
+def uninstrument():
+    """Возвращает свойства DRF, подменённые instrument()."""
+    for (owner, attribute), prop in list(original_properties.items()):
+        setattr(owner, attribute, prop)
+        del original_properties[owner, attribute]
+
+
+class ServerTimingMiddleware:
+    """Отдаёт разбивку времени запроса в заголовке Server-Timing.
+
+    Замер ведётся для каждого запроса, а заголовок добавляется, если
+    клиент прислал SERVER_TIMING_HEADER или пользователь — сотрудник.
+    view включает в себя db, а при SERVER_TIMING_DETAILED ещё serialize
+    и render. Заголовок уходит раньше
+    тела ответа, поэтому запросы, сделанные при отдаче потокового ответа,
+    в него не попадают; они учитываются в профиле, который передаётся
+    в сигнале request_profiled после закрытия потока. При
+    SERVER_TIMING_LOG полный профиль каждого запроса пишется в лог
+    одной строкой JSON.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        profile = RequestProfile()
+        token = current_profile.set(profile)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_profile.reset(token)
+        return self.process_response(request, response, profile)
+
+    async def __acall__(self, request):
+        profile = RequestProfile()
+        token = current_profile.set(profile)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_profile.reset(token)
+        return self.process_response(request, response, profile)
+
+    def process_response(self, request, response, profile):
+        profile.view_duration = time.perf_counter() - profile.started
+        user = getattr(request, 'user', None)
+        if request.headers.get(SERVER_TIMING_HEADER) or getattr(
+            user, 'is_staff', False
+        ):
+            durations = {'view': profile.view_duration, **profile.durations}
+            response['Server-Timing'] = ', '.join(
+                f'{name};dur={duration * 1000:.1f}'
+                + (f';desc="{profile.queries} queries"'
+                   if name == 'db' else '')
+                for name, duration in durations.items()
+            )
+        if response.streaming:
+            response.streaming_content = self.stream(
+                response.streaming_content, request, response, profile
+            )
+        else:
+            profile.response_size = len(response.content)
+            self.finish(request, response, profile)
+        return response
+
+    def stream(self, content, request, response, profile):
+        """Отдаёт тело ответа, продолжая замер до закрытия потока."""
+        content = iter(content)
+        try:
+            while True:
+                token = current_profile.set(profile)
+                try:
+                    chunk = next(content, None)
+                finally:
+                    current_profile.reset(token)
+                if chunk is None:
+                    return
+                profile.response_size += len(chunk)
+                yield chunk
+        finally:
+            self.finish(request, response, profile)
+
+    def finish(self, request, response, profile):
+        profile.duration = time.perf_counter() - profile.started
+        if SERVER_TIMING_LOG:
+            logger.info(json.dumps({
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'queries': profile.queries,
+                'size': profile.response_size,
+                'view_ms': round(profile.view_duration * 1000, 1),
+                'total_ms': round(profile.duration * 1000, 1),
+                **{
+                    f'{name}_ms': round(duration * 1000, 1)
+                    for name, duration in profile.durations.items()
+                },
+            }))
+        request_profiled.send(
+            sender=self.__class__, request=request, response=response,
+            profile=profile,
+        )
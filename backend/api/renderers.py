@@ -0,0 +1,89 @@
+import csv
+import json
+from io import BytesIO
+
+from rest_framework.renderers import BaseRenderer
+
+from backend.settings import SHOPPING_LIST_PDF_FONT
+
+
+class ShoppingListRenderer(BaseRenderer):
+    """Базовый рендерер списка покупок.
+
+    Сам список отдаётся представлением потоком через stream() или
+    render_document(); render() используется только для ответов с
+    ошибками.
+    """
+    charset = 'utf-8'
+    title = 'Список покупок:'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data, ensure_ascii=False).encode()
+
+
+class Echo:
+    def write(self, value):
+        return value
+
+
+class TextShoppingListRenderer(ShoppingListRenderer):
+    media_type = 'text/plain'
+    format = 'txt'
+
+    def stream(self, rows):
+        yield f'{self.title}\n\n'
+        for name, amount, measurement_unit in rows:
+            yield f'{name} - {amount} {measurement_unit}\n'
+
+
+class CSVShoppingListRenderer(ShoppingListRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+    def stream(self, rows):
+        writer = csv.writer(Echo())
+        yield writer.writerow(
+            ('Ингредиент', 'Количество', 'Единица измерения')
+        )
+        for row in rows:
+            yield writer.writerow(row)
+
+
+class PDFShoppingListRenderer(ShoppingListRenderer):
+    media_type = 'application/pdf'
+    format = 'pdf'
+    charset = None
+    font_name = 'ShoppingListFont'
+    font_size = 12
+    margin = 50
+
+    def render_document(self, rows):
+        from reportlab.lib.pagesizes import A4
+        from reportlab.pdfbase import pdfmetrics
+        from reportlab.pdfbase.ttfonts import TTFont
+        from reportlab.pdfgen import canvas
+
+        if self.font_name not in pdfmetrics.getRegisteredFontNames():
+            pdfmetrics.registerFont(
+                TTFont(self.font_name, SHOPPING_LIST_PDF_FONT)
+            )
+        buffer = BytesIO()
+        document = canvas.Canvas(buffer, pagesize=A4)
+        width, height = A4
+        line_height = self.font_size * 1.5
+        document.setFont(self.font_name, self.font_size + 4)
+        y = height - self.margin
+        document.drawString(self.margin, y, self.title)
+        y -= line_height * 2
+        document.setFont(self.font_name, self.font_size)
+        for name, amount, measurement_unit in rows:
+            if y < self.margin:
+                document.showPage()
+                document.setFont(self.font_name, self.font_size)
+                y = height - self.margin
+            document.drawString(
+                self.margin, y, f'• {name} - {amount} {measurement_unit}'
+            )
+            y -= line_height
+        document.save()
+        return buffer.getvalue()
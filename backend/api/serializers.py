@@ -1,16 +1,19 @@
 import base64
+from collections import Counter
 
 from django.contrib.auth.password_validation import validate_password
 from django.core import exceptions as django_exceptions
 from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
 from djoser.serializers import UserSerializer
 from recipes.models import (Favorite, Ingredient, IngredientAmount, Recipe,
-                            ShoppingCart, Tag)
+                            ShoppingCart, ShoppingListItem, Tag)
 from rest_framework import serializers
-from rest_framework.relations import SlugRelatedField
+from rest_framework.relations import MANY_RELATION_KWARGS, SlugRelatedField
 from users.models import Subscribe, User
 
-from backend.settings import MAX_VALUE, MIN_VALUE
+from backend.settings import BULK_RECIPES_LIMIT, MAX_VALUE, MIN_VALUE
 
 
 class Base64ImageFieldSerializer(serializers.ImageField):
@@ -23,6 +26,73 @@ class Base64ImageFieldSerializer(serializers.ImageField):
         return super().to_internal_value(data)
 
 
+def get_subscribed_ids(request):
+    """Возвращает id авторов, на которых подписан пользователь запроса.
+
+    Множество загружается одним запросом и кэшируется на объекте запроса.
+    """
+    if not hasattr(request, '_subscribed_ids'):
+        request._subscribed_ids = set()
+        if request.user.is_authenticated:
+            request._subscribed_ids = set(
+                Subscribe.objects.filter(
+                    user=request.user
+                ).values_list('author_id', flat=True)
+            )
+    return request._subscribed_ids
+
+
+def get_recipes_limit(request):
+    """Читает параметр recipes_limit, некорректные значения игнорируются."""
+    try:
+        limit = int(request.query_params['recipes_limit'])
+    except (KeyError, ValueError):
+        return None
+    return max(limit, 0)
+
+
+class BulkManyRelatedField(serializers.ManyRelatedField):
+    """Список связанных объектов, проверяемых одним запросом IN."""
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+        pks = list(dict.fromkeys(self.to_pk(pk) for pk in data))
+        objects = self.child_relation.get_queryset().in_bulk(pks)
+        missing = [pk for pk in pks if pk not in objects]
+        if missing:
+            raise serializers.ValidationError(
+                f'Объекты не найдены: {missing}'
+            )
+        return [objects[pk] for pk in pks]
+
+    def to_pk(self, value):
+        """Целое значение ключа; true и 1.9 не принимаются."""
+        try:
+            pk = int(value)
+        except (TypeError, ValueError, OverflowError):
+            pk = None
+        if isinstance(value, bool) or pk is None or (
+            not isinstance(value, str) and pk != value
+        ):
+            self.child_relation.fail(
+                'incorrect_type', data_type=type(value).__name__
+            )
+        return pk
+
+
+class BulkPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return BulkManyRelatedField(**list_kwargs)
+
+
 class UsersSerializer(UserSerializer):
     is_subscribed = serializers.SerializerMethodField()
 
@@ -44,11 +114,7 @@ class UsersSerializer(UserSerializer):
         return user
 
     def get_is_subscribed(self, obj):
-        if self.context['request'].user.is_authenticated:
-            return Subscribe.objects.filter(
-                author=obj
-            ).exists()
-        return False
+        return obj.pk in get_subscribed_ids(self.context['request'])
 
 
 class SubscribeSerializer(UsersSerializer):
@@ -59,27 +125,23 @@ class SubscribeSerializer(UsersSerializer):
         fields = UsersSerializer.Meta.fields + ('recipes', 'recipes_count',)
         read_only_fields = ('email', 'username', 'last_name', 'first_name',)
 
-    def get_is_subscribed(self, obj):
-        request = self.context['request']
-        if request.user.is_anonymous:
-            return False
-        return Subscribe.objects.filter(author=obj).exists()
-
     def get_recipes(self, obj):
-        request = self.context['request']
-        limit_recipes = request.query_params.get('recipes_limit')
-        if limit_recipes is not None:
-            recipes = obj.recipe_author.all()[:(int(limit_recipes))]
-        else:
+        recipes = getattr(obj, 'latest_recipes', None)
+        if recipes is None:
             recipes = obj.recipe_author.all()
-        return RecipeSerializer(
+            limit = get_recipes_limit(self.context['request'])
+            if limit is not None:
+                recipes = recipes[:limit]
+        return ShortRecipeSerializer(
             recipes,
             many=True,
-            context={'request': request}
+            context=self.context
         ).data
 
     def get_recipes_count(self, obj):
-        return Recipe.objects.filter(author=obj).count()
+        if hasattr(obj, 'recipes_count'):
+            return obj.recipes_count
+        return obj.recipe_author.count()
 
 
 class TagSerializer(serializers.ModelSerializer):
@@ -98,7 +160,7 @@ class IngredientSerializer(serializers.ModelSerializer):
 class ShortRecipeSerializer(serializers.ModelSerializer):
     class Meta:
         model = Recipe
-        fields = ('author', 'name', 'image', 'cooking_time',)
+        fields = ('id', 'name', 'image', 'cooking_time',)
 
 
 class IngredientsInRecipeSerializer(serializers.ModelSerializer):
@@ -124,17 +186,35 @@ class RecipeSerializer(serializers.ModelSerializer):
         read_only=True,
     )
     is_in_shopping_cart = serializers.SerializerMethodField()
+    image_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = Recipe
         fields = (
             'id', 'tags', 'author', 'ingredients',
             'is_favorited',
-            'name', 'image', 'text', 'cooking_time',
+            'name', 'image', 'image_variants', 'text', 'cooking_time',
             'is_in_shopping_cart',
         )
 
+    def get_image_variants(self, obj):
+        variants = obj.image_variants
+        if not obj.image or variants.get('source') != obj.image.name:
+            return {}
+        request = self.context['request']
+        return {
+            name: {
+                image_format: request.build_absolute_uri(
+                    default_storage.url(path)
+                )
+                for image_format, path in paths.items()
+            }
+            for name, paths in variants.items() if name != 'source'
+        }
+
     def get_is_in_shopping_cart(self, obj):
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
         if self.context['request'].user.is_authenticated:
             return ShoppingCart.objects.filter(
                 user=self.context['request'].user, recipe=obj
@@ -142,6 +222,8 @@ class RecipeSerializer(serializers.ModelSerializer):
         return False
 
     def get_is_favorited(self, obj):
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
         if self.context['request'].user.is_authenticated:
             return Favorite.objects.filter(
                 user=self.context['request'].user, recipe=obj
@@ -149,8 +231,16 @@ class RecipeSerializer(serializers.ModelSerializer):
         return False
 
 
+def represent_recipe(recipe, request):
+    """Рендерит рецепт, заново загружая его по общему плану выборки."""
+    recipe = Recipe.objects.with_related().with_user_flags(
+        request.user
+    ).get(pk=recipe.pk)
+    return RecipeSerializer(recipe, context={'request': request}).data
+
+
 class IngredientInRecipeWriteSerializer(serializers.ModelSerializer):
-    id = serializers.PrimaryKeyRelatedField(queryset=Ingredient.objects.all())
+    id = serializers.IntegerField(min_value=1)
     amount = serializers.IntegerField(min_value=MIN_VALUE,
                                       max_value=MAX_VALUE)
 
@@ -171,7 +261,7 @@ class CreateUpdateRecipeSerializer(serializers.ModelSerializer):
     ingredients = IngredientInRecipeWriteSerializer(
         many=True
     )
-    tags = serializers.PrimaryKeyRelatedField(
+    tags = BulkPrimaryKeyRelatedField(
         queryset=Tag.objects.all(),
         many=True
     )
@@ -182,16 +272,70 @@ class CreateUpdateRecipeSerializer(serializers.ModelSerializer):
                   'image', 'name', 'text',
                   'cooking_time', 'author')
 
+    def validate_ingredients(self, value):
+        counts = Counter(ingredient['id'] for ingredient in value)
+        duplicates = [pk for pk, count in counts.items() if count > 1]
+        if duplicates:
+            raise serializers.ValidationError(
+                f'Ингредиенты повторяются: {duplicates}'
+            )
+        found = set(Ingredient.objects.filter(
+            pk__in=counts
+        ).values_list('pk', flat=True))
+        missing = [pk for pk in counts if pk not in found]
+        if missing:
+            raise serializers.ValidationError(
+                f'Ингредиенты не найдены: {missing}'
+            )
+        return value
+
     def create_ingredients(self, ingredients, recipe):
         IngredientAmount.objects.bulk_create([
             IngredientAmount(
-                ingredient=ingredient.get('id'),
+                ingredient_id=ingredient.get('id'),
                 recipe=recipe,
                 amount=ingredient.get('amount')
             )
             for ingredient in ingredients
         ])
 
+    def update_ingredients(self, ingredients, recipe):
+        """Применяет к ингредиентам рецепта только изменившиеся строки."""
+        amounts = {
+            ingredient['id']: ingredient['amount']
+            for ingredient in ingredients
+        }
+        current = {row.ingredient_id: row for row in recipe.recipe.all()}
+        changes = {}
+        deleted = []
+        updated = []
+        for ingredient_id, row in current.items():
+            amount = amounts.get(ingredient_id)
+            if amount is None:
+                deleted.append(row.pk)
+                changes[ingredient_id] = -row.amount
+            elif amount != row.amount:
+                changes[ingredient_id] = amount - row.amount
+                row.amount = amount
+                updated.append(row)
+        created = [
+            IngredientAmount(
+                recipe=recipe, ingredient_id=ingredient_id, amount=amount
+            )
+            for ingredient_id, amount in amounts.items()
+            if ingredient_id not in current
+        ]
+        for row in created:
+            changes[row.ingredient_id] = row.amount
+        if deleted:
+            IngredientAmount.objects.filter(pk__in=deleted).delete()
+        if updated:
+            IngredientAmount.objects.bulk_update(updated, ('amount',))
+        if created:
+            IngredientAmount.objects.bulk_create(created)
+        ShoppingListItem.objects.apply_ingredient_changes(recipe, changes)
+
+    @transaction.atomic
     def create(self, validated_data):
         tags = validated_data.pop('tags')
         ingredients = validated_data.pop('ingredients')
@@ -200,29 +344,22 @@ class CreateUpdateRecipeSerializer(serializers.ModelSerializer):
         self.create_ingredients(ingredients, recipe)
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
-        recipe = instance
-        instance.image = validated_data.get('image', instance.image)
-        instance.name = validated_data.get('name', instance.name)
-        instance.text = validated_data.get('text', instance.name)
-        instance.cooking_time = validated_data.get(
-            'cooking_time',
-            instance.cooking_time
-        )
-        instance.tags.clear()
-        instance.ingredients.clear()
-        tags = validated_data.get('tags')
-        instance.tags.set(tags)
-        ingredients = validated_data.get('ingredients')
-        IngredientAmount.objects.filter(recipe=recipe).delete()
-        self.create_ingredients(ingredients, recipe)
+        ShoppingListItem.objects.lock_recipe(instance)
+        tags = validated_data.pop('tags', None)
+        ingredients = validated_data.pop('ingredients', None)
+        for field, value in validated_data.items():
+            setattr(instance, field, value)
         instance.save()
+        if tags is not None:
+            instance.tags.set(tags)
+        if ingredients is not None:
+            self.update_ingredients(ingredients, instance)
         return instance
 
     def to_representation(self, instance):
-        return RecipeSerializer(instance, context={
-            'request': self.context.get('request')
-        }).data
+        return represent_recipe(instance, self.context['request'])
 
 
 class FavoriteSerializer(serializers.ModelSerializer):
@@ -239,9 +376,7 @@ class FavoriteSerializer(serializers.ModelSerializer):
         return data
 
     def to_representation(self, instance):
-        return RecipeSerializer(
-            instance.recipe,
-            context={'request': self.context['request']}).data
+        return represent_recipe(instance.recipe, self.context['request'])
 
 
 class ShoppingCartSerializer(serializers.ModelSerializer):
@@ -257,10 +392,34 @@ class ShoppingCartSerializer(serializers.ModelSerializer):
                 {'errors': 'Рецепт уже добавлен в список покупок!'})
         return data
 
+    def create(self, validated_data):
+        ShoppingCart.objects.add_recipes(
+            validated_data['user'], [validated_data['recipe']]
+        )
+        return ShoppingCart.objects.get(**validated_data)
+
     def to_representation(self, instance):
-        return RecipeSerializer(
-            instance.recipe,
-            context={'request': self.context['request']}).data
+        return represent_recipe(instance.recipe, self.context['request'])
+
+
+class RecipeIdsSerializer(serializers.Serializer):
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=BULK_RECIPES_LIMIT,
+    )
+
+    def validate_recipes(self, value):
+        recipes = list(dict.fromkeys(value))
+        found = set(Recipe.objects.filter(
+            pk__in=recipes
+        ).values_list('pk', flat=True))
+        missing = [pk for pk in recipes if pk not in found]
+        if missing:
+            raise serializers.ValidationError(
+                f'Рецепты не найдены: {missing}'
+            )
+        return recipes
 
 
 class SubscribeCreateSerializer(serializers.ModelSerializer):
@@ -276,7 +435,7 @@ class SubscribeCreateSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError({
                 'errors': 'Нельзя подписаться на себя.'
             })
-        if Subscribe.objects.filter(author=author).exists():
+        if Subscribe.objects.filter(user=user, author=author).exists():
             raise serializers.ValidationError({
                 'errors': 'Вы уже подписаны на этого автора.'
             })
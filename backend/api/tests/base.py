@@ -0,0 +1,32 @@
+from unittest import mock
+
+from django.core.cache import cache, caches
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+LOCMEM_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'versions': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'versions',
+    },
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ApiTestCase(APITestCase):
+    """Тесты API с чистым кэшем в памяти.
+
+    Асинхронные маршруты выполняются в потоке теста, чтобы их запросы
+    шли через то же соединение и видели данные теста.
+    """
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        caches['versions'].clear()
+        patcher = mock.patch('api.async_views.executor', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
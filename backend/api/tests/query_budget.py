@@ -0,0 +1,126 @@
+import os
+import traceback
+from collections import defaultdict
+from contextlib import contextmanager
+
+from api.tests.base import ApiTestCase
+from django.conf import settings
+from django.db import connection
+
+PROJECT_APPS = ('api', 'recipes', 'users', 'jobs')
+
+
+def format_frame(frame):
+    path = frame.filename.split('site-packages' + os.sep)[-1]
+    if not os.path.isabs(path):
+        return f'{path}:{frame.lineno} in {frame.name}'
+    path = os.path.relpath(path, settings.BASE_DIR)
+    return f'{path}:{frame.lineno} in {frame.name}'
+
+
+def is_project_frame(frame):
+    path = os.path.relpath(frame.filename, settings.BASE_DIR)
+    return path.split(os.sep)[0] in PROJECT_APPS and (
+        os.sep + 'tests' + os.sep not in os.sep + path
+    )
+
+
+def get_call_site():
+    """Место в коде проекта, откуда пришёл запрос к базе.
+
+    Если запрос сделала библиотека, вызванная из кода проекта,
+    например аутентификация DRF, её строка указывается в скобках.
+    """
+    origin = None
+    for frame in reversed(traceback.extract_stack()[:-2]):
+        if is_project_frame(frame):
+            site = format_frame(frame)
+            if origin is None:
+                return site
+            return f'{site} ({format_frame(origin)})'
+        if origin is None and (
+            os.path.join('django', 'db') not in frame.filename
+        ):
+            origin = frame
+    return 'вне кода проекта'
+
+
+class QueryLog:
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries.append((get_call_site(), sql))
+        return execute(sql, params, many, context)
+
+    def __len__(self):
+        return len(self.queries)
+
+    def report(self):
+        by_site = defaultdict(list)
+        for call_site, sql in self.queries:
+            by_site[call_site].append(sql)
+        lines = []
+        for call_site, queries in sorted(
+            by_site.items(), key=lambda item: -len(item[1])
+        ):
+            lines.append(f'{len(queries)} x {call_site}')
+            lines.extend(f'    {sql}' for sql in dict.fromkeys(queries))
+        return '\n'.join(lines)
+
+
+class QueryBudgetTestCase(ApiTestCase):
+    """Проверка числа SQL-запросов, которые делают эндпоинты.
+
+    Перед замером выполняется прогревочный запрос: бюджеты описывают
+    установившийся режим, когда кэши тегов, индекса ингредиентов и
+    счётчиков страниц уже заполнены.
+    """
+
+    @contextmanager
+    def capture_queries(self):
+        log = QueryLog()
+        with connection.execute_wrapper(log):
+            yield log
+
+    def request(self, method, url, data=None):
+        """Выполняет запрос, дочитывая потоковый ответ до конца."""
+        response = getattr(self.client, method)(url, data, format='json')
+        if response.streaming:
+            response.body = b''.join(response.streaming_content)
+        else:
+            response.body = response.content
+        return response
+
+    def assertQueryBudget(self, budget, url, method='get', data=None,
+                          warmup=True, status=None):
+        if warmup and method == 'get':
+            self.request(method, url, data)
+        with self.capture_queries() as log:
+            response = self.request(method, url, data)
+        if status is not None:
+            self.assertEqual(response.status_code, status, response.body)
+        if len(log) > budget:
+            self.fail(
+                f'{method.upper()} {url}: {len(log)} запросов при бюджете '
+                f'{budget}\n{log.report()}'
+            )
+        return response
+
+    def assertConstantQueries(self, url, sizes=(1, 10, 50)):
+        """Число запросов не растёт вместе с размером страницы."""
+        counts = {}
+        reports = {}
+        for size in sizes:
+            page_url = url.format(size=size)
+            self.request('get', page_url)
+            with self.capture_queries() as log:
+                self.request('get', page_url)
+            counts[size] = len(log)
+            reports[size] = log.report()
+        if len(set(counts.values())) > 1:
+            largest = max(counts, key=counts.get)
+            self.fail(
+                f'{url}: число запросов зависит от размера страницы '
+                f'{counts}\n{reports[largest]}'
+            )
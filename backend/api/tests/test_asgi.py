@@ -0,0 +1,72 @@
+from asgiref.sync import async_to_sync
+from asgiref.testing import ApplicationCommunicator
+from recipes.models import Ingredient, IngredientAmount, Recipe, ShoppingCart
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+from users.models import User
+
+from backend.asgi import application
+
+
+class ASGITests(APITestCase):
+    """Запросы через ASGI-приложение, как под uvicorn."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='reader', email='reader@example.com',
+            first_name='Читатель', last_name='Тестовый', password='Pass-1234'
+        )
+        cls.token = Token.objects.create(user=cls.user)
+        recipe = Recipe.objects.create(
+            author=cls.user, name='Рецепт', text='Описание', cooking_time=10
+        )
+        for number in range(3):
+            IngredientAmount.objects.create(
+                recipe=recipe, amount=number + 1,
+                ingredient=Ingredient.objects.create(
+                    name=f'ингредиент {number}', measurement_unit='г'
+                ),
+            )
+        ShoppingCart.objects.add_recipes(cls.user, [recipe])
+
+    @async_to_sync
+    async def request(self, path, query_string=''):
+        communicator = ApplicationCommunicator(application, {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': path,
+            'raw_path': path.encode(),
+            'query_string': query_string.encode(),
+            'root_path': '',
+            'headers': [
+                (b'host', b'testserver'),
+                (b'authorization', f'Token {self.token.key}'.encode()),
+            ],
+            'client': ('127.0.0.1', 1),
+            'server': ('testserver', 80),
+        })
+        await communicator.send_input({'type': 'http.request', 'body': b''})
+        start = await communicator.receive_output(5)
+        body = b''
+        while True:
+            message = await communicator.receive_output(5)
+            body += message.get('body', b'')
+            if not message.get('more_body'):
+                break
+        await communicator.wait(5)
+        return start['status'], body.decode()
+
+    def test_download_shopping_cart_stream(self):
+        for renderer in ('txt', 'csv'):
+            with self.subTest(renderer=renderer):
+                status, body = self.request(
+                    '/api/recipes/download_shopping_cart/',
+                    f'format={renderer}',
+                )
+                self.assertEqual(status, 200)
+                for number in range(3):
+                    self.assertIn(f'ингредиент {number}', body)
@@ -0,0 +1,61 @@
+from api.tests.base import ApiTestCase
+from recipes.models import Recipe
+from rest_framework.authtoken.models import Token
+from users.models import User
+
+
+class ConditionalRequestTests(ApiTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='author', email='author@example.com',
+            first_name='Автор', last_name='Тестовый', password='Pass-1234'
+        )
+        cls.recipes = [
+            Recipe.objects.create(
+                author=cls.author, name=f'Рецепт {number}',
+                text='Описание', cooking_time=10,
+            )
+            for number in range(3)
+        ]
+
+    def test_author_change_invalidates_etag(self):
+        reader = User.objects.create_user(
+            username='reader', email='reader@example.com',
+            first_name='Читатель', last_name='Тестовый', password='Pass-1234'
+        )
+        token = Token.objects.create(user=reader)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        for url in ('/api/recipes/', f'/api/recipes/{self.recipes[0].pk}/'):
+            with self.subTest(url=url):
+                etag = self.client.get(url)['ETag']
+                User.objects.filter(pk=self.author.pk).update(
+                    first_name=f'Автор {url}'
+                )
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+
+    def test_last_modified_only_for_detail(self):
+        response = self.client.get('/api/recipes/')
+        self.assertFalse(response.has_header('Last-Modified'))
+        response = self.client.get(f'/api/recipes/{self.recipes[0].pk}/')
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(
+            f'/api/recipes/{self.recipes[0].pk}/',
+            HTTP_IF_MODIFIED_SINCE=response['Last-Modified'],
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_recipe_without_author(self):
+        recipe = Recipe.objects.create(
+            author=None, name='Без автора', text='Описание', cooking_time=10
+        )
+        response = self.client.get('/api/recipes/')
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(f'/api/recipes/{recipe.pk}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.data['author'])
+        response = self.client.get(
+            f'/api/recipes/{recipe.pk}/', HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, 304)
@@ -0,0 +1,88 @@
+from api.tests.base import ApiTestCase
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from prometheus_client import REGISTRY
+from recipes.models import Ingredient, IngredientAmount, Recipe, ShoppingCart
+from rest_framework.authtoken.models import Token
+from users.models import User
+
+
+class MetricsTests(ApiTestCase):
+    def get_sample(self, name, **labels):
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    def test_request_is_counted_by_route(self):
+        labels = {'route': 'tags-list', 'method': 'GET'}
+        requests = self.get_sample(
+            'http_requests_total', status='200', **labels
+        )
+        queries = self.get_sample('http_request_db_queries_sum', **labels)
+        self.assertEqual(self.client.get('/api/tags/').status_code, 200)
+        self.assertEqual(
+            self.get_sample('http_requests_total', status='200', **labels),
+            requests + 1,
+        )
+        self.assertEqual(
+            self.get_sample('http_request_db_queries_sum', **labels),
+            queries + 1,
+        )
+
+    def test_unknown_method_is_other(self):
+        labels = {'route': 'unmatched', 'status': '404'}
+        requests = self.get_sample(
+            'http_requests_total', method='other', **labels
+        )
+        self.client.generic('FOO', '/api/missing/')
+        self.assertEqual(
+            self.get_sample('http_requests_total', method='other', **labels),
+            requests + 1,
+        )
+        self.assertEqual(
+            self.get_sample('http_requests_total', method='FOO', **labels), 0
+        )
+
+    def test_metrics_endpoint(self):
+        self.client.get('/api/missing/')
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(
+            b'http_requests_total{method="GET",route="unmatched",'
+            b'status="404"}',
+            response.content,
+        )
+
+    def test_streamed_queries_are_counted(self):
+        user = User.objects.create_user(
+            username='reader', email='reader@example.com',
+            first_name='Читатель', last_name='Тестовый', password='Pass-1234'
+        )
+        recipe = Recipe.objects.create(
+            author=user, name='Рецепт', text='Описание', cooking_time=10
+        )
+        IngredientAmount.objects.create(
+            recipe=recipe, amount=1, ingredient=Ingredient.objects.create(
+                name='ингредиент', measurement_unit='г'
+            ),
+        )
+        ShoppingCart.objects.add_recipes(user, [recipe])
+        token = Token.objects.create(user=user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        labels = {
+            'route': 'recipes-download-shopping-cart', 'method': 'GET'
+        }
+        queries = self.get_sample('http_request_db_queries_sum', **labels)
+        size = self.get_sample('http_response_size_bytes_sum', **labels)
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(
+                '/api/recipes/download_shopping_cart/?format=txt'
+            )
+            body = b''.join(response.streaming_content)
+        self.assertIn('ингредиент'.encode(), body)
+        self.assertEqual(
+            self.get_sample('http_request_db_queries_sum', **labels),
+            queries + len(captured),
+        )
+        self.assertEqual(
+            self.get_sample('http_response_size_bytes_sum', **labels),
+            size + len(body),
+        )
@@ -0,0 +1,56 @@
+import base64
+import json
+
+from api.tests.base import ApiTestCase
+from recipes.models import Recipe
+from users.models import User
+
+
+def make_cursor(cursor):
+    return base64.urlsafe_b64encode(json.dumps(cursor).encode()).decode()
+
+
+class KeysetPaginationTests(ApiTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(
+            username='author', email='author@example.com',
+            first_name='Автор', last_name='Тестовый', password='Pass-1234'
+        )
+        for number in range(3):
+            Recipe.objects.create(
+                author=author, name=f'Рецепт {number}', text='Описание',
+                cooking_time=10,
+            )
+
+    def test_next_cursor(self):
+        response = self.client.get('/api/recipes/?cursor=&limit=2')
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(response.data['next'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 1)
+
+    def test_invalid_cursor(self):
+        for url, cursor in (
+            ('/api/recipes/', {'p': ['x', 1], 'r': 0}),
+            ('/api/users/', {'p': ['author', 'x'], 'r': 0}),
+        ):
+            response = self.client.get(url, {'cursor': make_cursor(cursor)})
+            self.assertEqual(response.status_code, 404)
+        for url in ('/api/recipes/', '/api/users/'):
+            for cursor in (
+                {'p': [None, 1], 'r': 0},
+                {'p': '2021-01-01', 'r': 0},
+                {'p': 'ab', 'r': 0},
+                {'p': ['2021-01-01T00:00:00+00:00', 'ab'], 'r': 0},
+                {'p': [{}, []], 'r': 0},
+                ['x', 1],
+                'ab',
+            ):
+                with self.subTest(url=url, cursor=cursor):
+                    response = self.client.get(
+                        url, {'cursor': make_cursor(cursor)}
+                    )
+                    self.assertEqual(response.status_code, 404)
+        response = self.client.get('/api/recipes/', {'cursor': '!!!'})
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,174 @@
+from api.tests.query_budget import QueryBudgetTestCase
+from recipes.models import (Favorite, Ingredient, IngredientAmount, Recipe,
+                            ShoppingCart, Tag)
+from rest_framework.authtoken.models import Token
+from users.models import Subscribe, User
+
+AUTHORS = 55
+
+
+class QueryBudgetTests(QueryBudgetTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='reader', email='reader@example.com',
+            first_name='Читатель', last_name='Тестовый', password='Pass-1234'
+        )
+        cls.token = Token.objects.create(user=cls.user)
+        cls.tags = [
+            Tag.objects.create(name=f'Тег {number}', color=f'#00000{number}',
+                               slug=f'tag-{number}')
+            for number in range(3)
+        ]
+        Ingredient.objects.bulk_create(
+            Ingredient(name=f'ингредиент {number}', measurement_unit='г')
+            for number in range(10)
+        )
+        cls.ingredients = list(Ingredient.objects.all())
+        User.objects.bulk_create(
+            User(username=f'author-{number}',
+                 email=f'author-{number}@example.com',
+                 first_name='Автор', last_name=str(number))
+            for number in range(AUTHORS)
+        )
+        authors = list(User.objects.filter(username__startswith='author-'))
+        cls.author = authors[0]
+        Subscribe.objects.bulk_create(
+            Subscribe(user=cls.user, author=author) for author in authors
+        )
+        cls.recipes = []
+        amounts = []
+        for number in range(AUTHORS * 2):
+            recipe = Recipe.objects.create(
+                author=authors[number % AUTHORS], name=f'Рецепт {number}',
+                text='Описание', cooking_time=10,
+            )
+            recipe.tags.set(cls.tags[:number % 3 + 1])
+            amounts.extend(
+                IngredientAmount(recipe=recipe, ingredient=ingredient,
+                                 amount=number + 1)
+                for ingredient in cls.ingredients[number % 5:number % 5 + 3]
+            )
+            cls.recipes.append(recipe)
+        IngredientAmount.objects.bulk_create(amounts)
+        Favorite.objects.add_recipes(cls.user, cls.recipes[::2])
+        ShoppingCart.objects.add_recipes(cls.user, cls.recipes[:10])
+        cls.new_recipe = {
+            'name': 'Новый рецепт',
+            'text': 'Описание',
+            'cooking_time': 5,
+            'tags': [tag.pk for tag in cls.tags],
+            'ingredients': [
+                {'id': ingredient.pk, 'amount': 10}
+                for ingredient in cls.ingredients[:5]
+            ],
+        }
+
+    def setUp(self):
+        super().setUp()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_recipes_list(self):
+        self.assertQueryBudget(5, '/api/recipes/', status=200)
+        self.assertQueryBudget(5, '/api/recipes/?cursor=', status=200)
+        self.assertQueryBudget(
+            6, f'/api/recipes/?tags={self.tags[0].slug}&is_favorited=1'
+               f'&is_in_shopping_cart=1&author={self.author.pk}',
+            status=200,
+        )
+        self.assertQueryBudget(5, '/api/recipes/?search=Рецепт', status=200)
+
+    def test_recipes_list_anonymous(self):
+        self.client.credentials()
+        self.assertQueryBudget(3, '/api/recipes/', status=200)
+
+    def test_recipes_list_page_size(self):
+        self.assertConstantQueries('/api/recipes/?limit={size}')
+        self.assertConstantQueries('/api/recipes/?cursor=&limit={size}')
+
+    def test_recipe_detail(self):
+        self.assertQueryBudget(
+            5, f'/api/recipes/{self.recipes[0].pk}/', status=200
+        )
+
+    def test_recipe_create_update_delete(self):
+        response = self.assertQueryBudget(
+            13, '/api/recipes/', 'post', self.new_recipe, status=201
+        )
+        url = f'/api/recipes/{response.data["id"]}/'
+        changed = dict(self.new_recipe, ingredients=[
+            {'id': ingredient.pk, 'amount': 20}
+            for ingredient in self.ingredients[3:8]
+        ])
+        self.assertQueryBudget(20, url, 'patch', changed, status=200)
+        self.assertQueryBudget(13, url, 'delete', status=204)
+
+    def test_favorite_and_shopping_cart(self):
+        recipe = self.recipes[11]
+        for action, budgets in (
+            ('favorite', (10, 2, 4)),
+            ('shopping_cart', (17, 7, 8)),
+        ):
+            add, remove, bulk = budgets
+            url = f'/api/recipes/{recipe.pk}/{action}/'
+            self.assertQueryBudget(add, url, 'post', status=201)
+            self.assertQueryBudget(remove, url, 'delete', status=204)
+            self.assertQueryBudget(
+                bulk, f'/api/recipes/{action}/', 'post',
+                {'recipes': [other.pk for other in self.recipes[20:70]]},
+                status=200,
+            )
+        self.assertQueryBudget(
+            6, '/api/recipes/shopping_cart/clear/', 'delete', status=200
+        )
+
+    def test_download_shopping_cart(self):
+        for renderer in ('txt', 'csv', 'pdf'):
+            self.assertQueryBudget(
+                2, f'/api/recipes/download_shopping_cart/?format={renderer}',
+                status=200,
+            )
+
+    def test_tags_and_ingredients(self):
+        self.assertQueryBudget(1, '/api/tags/', status=200)
+        self.assertQueryBudget(1, f'/api/tags/{self.tags[0].pk}/', status=200)
+        self.assertQueryBudget(2, '/api/ingredients/', status=200)
+        self.assertQueryBudget(1, '/api/ingredients/?name=ингр', status=200)
+        self.assertQueryBudget(
+            2, f'/api/ingredients/{self.ingredients[0].pk}/', status=200
+        )
+
+    def test_users(self):
+        self.assertQueryBudget(3, '/api/users/', status=200)
+        self.assertQueryBudget(3, f'/api/users/{self.author.pk}/', status=200)
+        self.assertQueryBudget(2, '/api/users/me/', status=200)
+        self.assertConstantQueries('/api/users/?limit={size}')
+
+    def test_subscriptions(self):
+        self.assertQueryBudget(
+            4, '/api/users/subscriptions/?recipes_limit=1', status=200
+        )
+        self.assertConstantQueries(
+            '/api/users/subscriptions/?limit={size}&recipes_limit=3'
+        )
+
+    def test_subscriptions_empty(self):
+        reader = User.objects.create_user(
+            username='lonely', email='lonely@example.com',
+            first_name='Без', last_name='Подписок', password='Pass-1234'
+        )
+        token = Token.objects.create(user=reader)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        response = self.assertQueryBudget(
+            2, '/api/users/subscriptions/?page=1&limit=6&recipes_limit=3',
+            status=200,
+        )
+        self.assertEqual(response.data['results'], [])
+
+    def test_subscribe(self):
+        author = User.objects.create(
+            username='new-author', email='new-author@example.com'
+        )
+        url = f'/api/users/{author.pk}/subscribe/'
+        self.assertQueryBudget(9, url, 'post', status=201)
+        self.assertQueryBudget(4, url, 'delete', status=204)
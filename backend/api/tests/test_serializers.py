@@ -0,0 +1,26 @@
+from api.serializers import CreateUpdateRecipeSerializer
+from api.tests.base import ApiTestCase
+from recipes.models import Tag
+
+
+class TagIdsTests(ApiTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.tag = Tag.objects.create(name='Завтрак', color='#E26C2D',
+                                     slug='breakfast')
+
+    def get_errors(self, tags):
+        serializer = CreateUpdateRecipeSerializer(data={'tags': tags})
+        serializer.is_valid()
+        return serializer.errors.get('tags')
+
+    def test_integer_ids(self):
+        self.assertIsNone(self.get_errors([self.tag.pk, str(self.tag.pk)]))
+
+    def test_bool_and_fractional_ids_rejected(self):
+        for value in (True, 1.9, '1.9', None, [1]):
+            with self.subTest(value=value):
+                self.assertEqual(self.get_errors([value]), [
+                    'Некорректный тип. Ожидалось значение первичного ключа, '
+                    f'получен {type(value).__name__}.'
+                ])
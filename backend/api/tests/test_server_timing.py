@@ -0,0 +1,87 @@
+import json
+from unittest import mock
+
+from api.profiling import instrument, uninstrument
+from api.tests.base import ApiTestCase
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from recipes.models import Recipe, Tag
+from rest_framework.authtoken.models import Token
+from users.models import User
+
+from backend.settings import SERVER_TIMING_HEADER
+
+
+class ServerTimingTests(ApiTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='reader', email='reader@example.com',
+            first_name='Читатель', last_name='Тестовый', password='Pass-1234'
+        )
+        cls.staff = User.objects.create_user(
+            username='staff', email='staff@example.com',
+            first_name='Сотрудник', last_name='Тестовый',
+            password='Pass-1234', is_staff=True,
+        )
+        tag = Tag.objects.create(name='Тег', color='#000000', slug='tag')
+        for number in range(3):
+            Recipe.objects.create(
+                author=cls.user, name=f'Рецепт {number}', text='Описание',
+                cooking_time=10,
+            ).tags.set([tag])
+
+    def get_metrics(self, response):
+        return {
+            entry.split(';')[0]: entry
+            for entry in response['Server-Timing'].split(', ')
+        }
+
+    def test_no_header_without_opt_in(self):
+        token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        response = self.client.get('/api/recipes/')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('Server-Timing'))
+
+    def request_timing(self):
+        return self.client.get('/api/recipes/', **{
+            'HTTP_' + SERVER_TIMING_HEADER.upper().replace('-', '_'): '1'
+        })
+
+    def test_header_on_request(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.request_timing()
+        self.assertEqual(response.status_code, 200)
+        metrics = self.get_metrics(response)
+        self.assertEqual(set(metrics), {'view', 'db'})
+        self.assertIn(f'desc="{len(queries)} queries"', metrics['db'])
+
+    def test_detailed_header(self):
+        instrument()
+        self.addCleanup(uninstrument)
+        instrument()
+        metrics = self.get_metrics(self.request_timing())
+        self.assertEqual(
+            set(metrics), {'view', 'db', 'serialize', 'render'}
+        )
+        uninstrument()
+        self.assertEqual(
+            set(self.get_metrics(self.request_timing())), {'view', 'db'}
+        )
+
+    def test_header_for_staff(self):
+        token = Token.objects.create(user=self.staff)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        response = self.client.get('/api/tags/')
+        self.assertIn('db', self.get_metrics(response))
+
+    def test_log_line(self):
+        with mock.patch('api.profiling.SERVER_TIMING_LOG', True), \
+                self.assertLogs('api.profiling') as logs:
+            response = self.client.get('/api/recipes/')
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['path'], '/api/recipes/')
+        self.assertEqual(record['status'], 200)
+        self.assertEqual(record['size'], len(response.content))
+        self.assertGreater(record['queries'], 0)
@@ -0,0 +1,76 @@
+from types import SimpleNamespace
+
+from django.contrib import admin
+
+from api.tests.base import ApiTestCase
+from recipes.models import (Ingredient, IngredientAmount, Recipe,
+                            ShoppingCart, ShoppingListItem)
+from users.models import User
+
+
+class ShoppingListTests(ApiTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='reader', email='reader@example.com',
+            first_name='Читатель', last_name='Тестовый', password='Pass-1234'
+        )
+        cls.author = User.objects.create_user(
+            username='author', email='author@example.com',
+            first_name='Автор', last_name='Тестовый', password='Pass-1234'
+        )
+        Ingredient.objects.bulk_create(
+            Ingredient(name=f'ингредиент {number}', measurement_unit='г')
+            for number in range(3)
+        )
+        ingredients = list(Ingredient.objects.all())
+        cls.recipes = []
+        for number in range(3):
+            recipe = Recipe.objects.create(
+                author=cls.author, name=f'Рецепт {number}', text='Описание',
+                cooking_time=10,
+            )
+            for ingredient in ingredients[:number + 1]:
+                IngredientAmount.objects.create(
+                    recipe=recipe, ingredient=ingredient, amount=number + 1
+                )
+            cls.recipes.append(recipe)
+        ShoppingCart.objects.add_recipes(cls.user, cls.recipes)
+
+    def get_items(self):
+        return dict(ShoppingListItem.objects.values_list(
+            'ingredient__name', 'amount'
+        ))
+
+    def test_queryset_delete_updates_shopping_list(self):
+        Recipe.objects.filter(pk__in=[
+            recipe.pk for recipe in self.recipes[1:]
+        ]).delete()
+        self.assertEqual(self.get_items(), {'ингредиент 0': 1})
+
+    def test_admin_cart_changes_update_shopping_list(self):
+        cart_admin = admin.site._registry[ShoppingCart]
+        cart_admin.delete_queryset(None, ShoppingCart.objects.filter(
+            recipe__in=self.recipes[1:]
+        ))
+        self.assertEqual(self.get_items(), {'ингредиент 0': 1})
+        cart = ShoppingCart(user=self.user, recipe=self.recipes[2])
+        cart_admin.save_model(None, cart, None, False)
+        self.assertIsNotNone(cart.pk)
+        self.assertEqual(self.get_items(), {
+            'ингредиент 0': 4, 'ингредиент 1': 3, 'ингредиент 2': 3,
+        })
+
+    def test_admin_ingredient_changes_update_shopping_list(self):
+        recipe = self.recipes[0]
+
+        def save():
+            IngredientAmount.objects.filter(recipe=recipe).update(amount=5)
+
+        form = SimpleNamespace(instance=recipe, save_m2m=lambda: None)
+        admin.site._registry[Recipe].save_related(
+            None, form, [SimpleNamespace(save=save)], True
+        )
+        self.assertEqual(self.get_items(), {
+            'ингредиент 0': 10, 'ингредиент 1': 5, 'ингредиент 2': 3,
+        })
@@ -1,8 +1,15 @@
+from api.async_views import async_routes
 from api.views import (IngredientViewSet, RecipeViewSet, TagViewSet,
                        UsersViewSet)
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
+ASYNC_ROUTES = (
+    'tags-list', 'tags-detail',
+    'ingredients-list', 'ingredients-detail',
+    'recipes-list', 'recipes-detail',
+)
+
 v1_router = DefaultRouter()
 v1_router.register("tags", TagViewSet, "tags")
 v1_router.register("ingredients", IngredientViewSet, "ingredients")
@@ -10,7 +17,7 @@ v1_router.register("recipes", RecipeViewSet, "recipes")
 v1_router.register("users", UsersViewSet, basename="users")
 
 urlpatterns = (
-    path("", include(v1_router.urls)),
+    path("", include(async_routes(v1_router.urls, ASYNC_ROUTES))),
     path("", include("djoser.urls")),
     path("auth/", include("djoser.urls.authtoken")),
 )
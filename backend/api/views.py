@@ -1,24 +1,42 @@
+from collections import defaultdict
+from hashlib import md5
+
+from api.conditional import (get_recipe_etag, get_recipe_last_modified,
+                             not_modified_response, set_validators)
 from api.filters import IngredientFilter, RecipeFilter
+from api.negotiation import FallbackContentNegotiation
 from api.paginations import RecipePagination
 from api.permissions import AuthorOrReadOnly, AmdinOrReadOnly
+from api.profiling import measure
+from api.renderers import (CSVShoppingListRenderer, PDFShoppingListRenderer,
+                           TextShoppingListRenderer)
 from api.serializers import (CreateUpdateRecipeSerializer, FavoriteSerializer,
-                             IngredientSerializer, RecipeSerializer,
-                             SetPasswordSerializer, ShoppingCartSerializer,
+                             IngredientSerializer, RecipeIdsSerializer,
+                             RecipeSerializer, SetPasswordSerializer,
+                             ShoppingCartSerializer,
                              SubscribeCreateSerializer, SubscribeSerializer,
-                             TagSerializer, UsersSerializer)
-from django.db.models import Sum
-from django.http.response import HttpResponse
+                             TagSerializer, UsersSerializer,
+                             get_recipes_limit)
+from django.core.cache import cache
+from django.db.models import Count
+from django.http.response import HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
-from recipes.models import (Favorite, Ingredient, IngredientAmount, Recipe,
-                            ShoppingCart, Tag)
+from recipes.cache import tag_cache
+from recipes.ingredient_index import ingredient_index
+from recipes.models import (Favorite, Ingredient, Recipe, ShoppingCart,
+                            ShoppingListItem, Tag)
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
 from rest_framework.filters import SearchFilter
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from users.models import Subscribe, User
 
+from backend.settings import (INGREDIENT_SEARCH_LIMIT,
+                              SHOPPING_LIST_CACHE_TIMEOUT)
+
 
 class TagViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Tag.objects.all()
@@ -26,6 +44,15 @@ class TagViewSet(viewsets.ReadOnlyModelViewSet):
     permission_classes = (AmdinOrReadOnly,)
     pagination_class = None
 
+    def list(self, request, *args, **kwargs):
+        return Response(tag_cache.get())
+
+    def retrieve(self, request, *args, **kwargs):
+        for tag in tag_cache.get():
+            if str(tag['id']) == kwargs['pk']:
+                return Response(tag)
+        raise NotFound
+
 
 class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Ingredient.objects.all()
@@ -36,6 +63,14 @@ class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
     pagination_class = None
     search_fields = ('^name',)
 
+    def list(self, request, *args, **kwargs):
+        name = request.query_params.get('name')
+        if name:
+            return Response(
+                ingredient_index.get().search(name, INGREDIENT_SEARCH_LIMIT)
+            )
+        return super().list(request, *args, **kwargs)
+
 
 class RecipeViewSet(viewsets.ModelViewSet):
     queryset = Recipe.objects.all()
@@ -45,11 +80,48 @@ class RecipeViewSet(viewsets.ModelViewSet):
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
 
+    def get_queryset(self):
+        return Recipe.objects.with_related().with_user_flags(
+            self.request.user
+        )
+
     def get_serializer_class(self):
         if self.request.method == 'GET':
             return RecipeSerializer
         return CreateUpdateRecipeSerializer
 
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            recipes = list(queryset)
+            envelope = None
+        else:
+            recipes = page
+            envelope = self.get_paginated_response([]).data
+        etag = get_recipe_etag(request, recipes, envelope)
+        response = not_modified_response(request, etag, None)
+        if response is not None:
+            return response
+        serializer = self.get_serializer(recipes, many=True)
+        if page is None:
+            response = Response(serializer.data)
+        else:
+            response = self.get_paginated_response(serializer.data)
+        return set_validators(response, etag, None)
+
+    def retrieve(self, request, *args, **kwargs):
+        recipe = self.get_object()
+        etag = get_recipe_etag(request, [recipe])
+        last_modified = get_recipe_last_modified(request, recipe)
+        response = not_modified_response(request, etag, last_modified)
+        if response is not None:
+            return response
+        serializer = self.get_serializer(recipe)
+        return set_validators(
+            Response(serializer.data), etag, last_modified
+        )
+
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
@@ -80,9 +152,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
                 serializers=FavoriteSerializer)
 
         if request.method == 'DELETE':
-            fav_rec = Favorite.objects.filter(recipe_id=pk)
-            if fav_rec.exists():
-                fav_rec.delete()
+            if Favorite.objects.remove_recipes(request.user, [pk]):
                 return Response(
                     {'message': 'Рецепт удален из избранного'},
                     status=status.HTTP_204_NO_CONTENT)
@@ -103,9 +173,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
                 pk=pk,
                 serializers=ShoppingCartSerializer)
         if request.method == 'DELETE':
-            rec_in_cart = ShoppingCart.objects.filter(recipe_id=pk)
-            if rec_in_cart.exists():
-                rec_in_cart.delete()
+            if ShoppingCart.objects.remove_recipes(request.user, [pk]):
                 return Response(
                     {'message': 'Рецепт удален из списка покупок'},
                     status=status.HTTP_204_NO_CONTENT)
@@ -113,31 +181,105 @@ class RecipeViewSet(viewsets.ModelViewSet):
                 {'errors': 'Рецепт уже удален из списка покупок!'},
                 status=status.HTTP_400_BAD_REQUEST)
 
+    @staticmethod
+    def bulk_update_recipes(request, manager):
+        serializer = RecipeIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        recipes = serializer.validated_data['recipes']
+        if request.method == 'POST':
+            added = len(manager.add_recipes(request.user, recipes))
+            return Response(
+                {'added': added, 'skipped': len(recipes) - added}
+            )
+        removed = manager.remove_recipes(request.user, recipes)
+        return Response(
+            {'removed': removed, 'skipped': len(recipes) - removed}
+        )
+
+    @action(
+        detail=False,
+        methods=('post', 'delete'),
+        permission_classes=(IsAuthenticated,),
+        url_path='favorite',
+        url_name='favorite-bulk',
+    )
+    def favorite_bulk(self, request):
+        return self.bulk_update_recipes(request, Favorite.objects)
+
+    @action(
+        detail=False,
+        methods=('post', 'delete'),
+        permission_classes=(IsAuthenticated,),
+        url_path='shopping_cart',
+        url_name='shopping-cart-bulk',
+    )
+    def shopping_cart_bulk(self, request):
+        return self.bulk_update_recipes(request, ShoppingCart.objects)
+
+    @action(
+        detail=False,
+        methods=('delete',),
+        permission_classes=(IsAuthenticated,),
+        url_path='shopping_cart/clear',
+    )
+    def clear_shopping_cart(self, request):
+        removed = ShoppingCart.objects.remove_recipes(request.user)
+        return Response({'removed': removed})
+
+    @staticmethod
+    def get_shopping_list_rows(user):
+        # Строки читаются целиком в потоке представления: под ASGI Django
+        # перебирает потоковый ответ в цикле событий, где запросы к базе
+        # запрещены. Потоком отдаётся только отрисованный документ.
+        return list(ShoppingListItem.objects.filter(user=user).values_list(
+            'ingredient__name', 'amount', 'ingredient__measurement_unit'
+        ).order_by('ingredient__name'))
+
+    def get_shopping_list_document(self, user, renderer):
+        cart = ShoppingCart.objects.filter(user=user).order_by(
+            'recipe_id'
+        ).values_list('recipe_id', 'recipe__updated_at')
+        key = f'shopping-list:{renderer.format}:' + md5(
+            repr((ingredient_index.get_version(), list(cart))).encode()
+        ).hexdigest()
+        document = cache.get(key)
+        if document is None:
+            with measure('render'):
+                document = renderer.render_document(
+                    self.get_shopping_list_rows(user)
+                )
+            cache.set(key, document, SHOPPING_LIST_CACHE_TIMEOUT)
+        return document
+
     @action(
         detail=False,
         methods=('GET',),
-        permission_classes=(IsAuthenticated,)
+        permission_classes=(IsAuthenticated,),
+        renderer_classes=(
+            TextShoppingListRenderer,
+            CSVShoppingListRenderer,
+            PDFShoppingListRenderer,
+        ),
+        content_negotiation_class=FallbackContentNegotiation,
     )
     def download_shopping_cart(self, request):
-        user = request.user
-        ingredients = IngredientAmount.objects.filter(
-            recipe__recipe_shopping_cart__user=user).values(
-            'ingredient__name',
-            'ingredient__measurement_unit').annotate(
-            amount=Sum('amount')
-        )
-        data = []
-        for ingredient in ingredients:
-            data.append(
-                f'{ingredient["ingredient__name"]} - '
-                f'{ingredient["amount"]} '
-                f'{ingredient["ingredient__measurement_unit"]}'
+        renderer = request.accepted_renderer
+        if isinstance(renderer, PDFShoppingListRenderer):
+            response = HttpResponse(
+                self.get_shopping_list_document(request.user, renderer),
+                content_type=renderer.media_type
+            )
+        else:
+            rows = self.get_shopping_list_rows(request.user)
+            response = StreamingHttpResponse(
+                renderer.stream(rows),
+                content_type=f'{renderer.media_type}; '
+                             f'charset={renderer.charset}'
             )
-        content = 'Список покупок:\n\n' + '\n'.join(data)
-        filename = 'shopping_list.txt'
-        request = HttpResponse(content, content_type='text/plain')
-        request['Content-Disposition'] = f'attachment; filename={filename}'
-        return request
+        response['Content-Disposition'] = (
+            f'attachment; filename="shopping_list.{renderer.format}"'
+        )
+        return response
 
 
 class UsersViewSet(viewsets.ModelViewSet):
@@ -145,6 +287,7 @@ class UsersViewSet(viewsets.ModelViewSet):
     serializer_class = UsersSerializer
     permission_classes = (AllowAny,)
     pagination_class = RecipePagination
+    cursor_ordering = ('username', 'id')
 
     @action(
         detail=False,
@@ -180,7 +323,7 @@ class UsersViewSet(viewsets.ModelViewSet):
             return Response(serializer.data, status=status.HTTP_201_CREATED)
 
         if request.method == 'DELETE':
-            subscription = Subscribe.objects.filter(author=author)
+            subscription = Subscribe.objects.filter(user=user, author=author)
             if subscription.exists():
                 subscription.delete()
                 return Response(
@@ -195,10 +338,21 @@ class UsersViewSet(viewsets.ModelViewSet):
         permission_classes=(IsAuthenticated,)
     )
     def subscriptions(self, request):
+        authors = self.paginate_queryset(
+            User.objects.filter(author__user=request.user).annotate(
+                recipes_count=Count('recipe_author', distinct=True)
+            ).order_by('username')
+        )
+        recipes = Recipe.objects.latest_per_author(
+            authors, get_recipes_limit(request)
+        ).only('id', 'name', 'image', 'cooking_time', 'author_id')
+        recipes_by_author = defaultdict(list)
+        for recipe in recipes:
+            recipes_by_author[recipe.author_id].append(recipe)
+        for author in authors:
+            author.latest_recipes = recipes_by_author[author.pk]
         serializer = SubscribeSerializer(
-            self.paginate_queryset(
-                User.objects.filter(author__user=request.user)
-            ),
+            authors,
             many=True,
             context={'request': request}
         )
@@ -23,6 +23,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     "rest_framework",
     "rest_framework.authtoken",
     "djoser",
@@ -30,10 +31,12 @@ INSTALLED_APPS = [
     'api',
     'recipes',
     'users',
+    'jobs',
     'import_export',
 ]
 
 MIDDLEWARE = [
+    'api.profiling.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -78,6 +81,29 @@ DATABASES = {
     }
 }
 
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            default='django.core.cache.backends.filebased.FileBasedCache'
+        ),
+        'LOCATION': os.getenv(
+            'CACHE_LOCATION', default='/var/tmp/foodgram_cache'
+        ),
+    },
+    # Версии данных VersionedCache. Ключей здесь единицы, поэтому кэш
+    # не доходит до MAX_ENTRIES и не вычищается вместе с остальными.
+    'versions': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            default='django.core.cache.backends.filebased.FileBasedCache'
+        ),
+        'LOCATION': os.getenv(
+            'CACHE_VERSIONS_LOCATION', default='/var/tmp/foodgram_versions'
+        ),
+    },
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -141,3 +167,78 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 MIN_VALUE = 1
 
 MAX_VALUE = 32000
+
+INGREDIENT_SEARCH_LIMIT = 50
+
+BULK_RECIPES_LIMIT = 100
+
+COUNT_CACHE_TIMEOUT = 30
+
+COUNT_ESTIMATE_THRESHOLD = 100000
+
+SHOPPING_LIST_CACHE_TIMEOUT = 60 * 60 * 24
+
+SHOPPING_LIST_PDF_FONT = os.getenv(
+    'SHOPPING_LIST_PDF_FONT',
+    default='/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf'
+)
+
+IMAGE_VARIANT_SIZES = {
+    'thumbnail': (480, 480),
+    'detail': (1280, 1280),
+}
+
+IMAGE_VARIANT_FORMATS = ('WEBP', 'AVIF')
+
+IMAGE_VARIANT_QUALITY = 80
+
+IMAGE_VARIANTS_DIR = 'variants'
+
+DEFAULT_FILE_STORAGE = 'recipes.storage.ContentAddressedStorage'
+
+MEDIA_CLEANUP_GRACE_PERIOD = 60 * 60
+
+TASK_MAX_ATTEMPTS = 5
+
+TASK_RETRY_DELAY = 30
+
+TASK_POLL_INTERVAL = 1
+
+TASK_TIMEOUT = 60 * 30
+
+ASYNC_VIEW_THREADS = int(os.getenv('ASYNC_VIEW_THREADS', default=8))
+
+INGREDIENTS_DATA_PATH = os.getenv(
+    'INGREDIENTS_DATA_PATH',
+    default=BASE_DIR.parent / 'data' / 'ingredients.csv'
+)
+
+INGREDIENTS_LOAD_BATCH_SIZE = 1000
+
+RECIPES_TRANSFER_BATCH_SIZE = 1000
+
+GENERATED_DATA_PASSWORD = 'benchmark-password'
+
+BENCHMARK_REQUESTS = 200
+
+BENCHMARK_CONCURRENCY = 4
+
+SERVER_TIMING_HEADER = 'X-Server-Timing'
+
+SERVER_TIMING_LOG = os.getenv('SERVER_TIMING_LOG', default='False') == 'True'
+
+SERVER_TIMING_DETAILED = os.getenv(
+    'SERVER_TIMING_DETAILED', default='False'
+) == 'True'
+
+METRICS_URL = 'metrics'
+
+METRICS_DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10
+)
+
+METRICS_QUERIES_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+METRICS_SIZE_BUCKETS = (
+    256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304
+)
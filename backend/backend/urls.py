@@ -1,7 +1,11 @@
+from api.metrics import metrics
 from django.contrib import admin
 from django.urls import include, path
 
+from backend.settings import METRICS_URL
+
 urlpatterns = (
     path("admin/", admin.site.urls),
     path("api/", include("api.urls")),
+    path(METRICS_URL, metrics, name="metrics"),
 )
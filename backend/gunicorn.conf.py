@@ -0,0 +1,20 @@
+import os
+import shutil
+
+# Метрики процессов gunicorn складываются через файлы в этом каталоге.
+# Переменная задаётся здесь, чтобы не влиять на команды manage.py, и до
+# импорта prometheus_client, который читает её при загрузке.
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/metrics')
+
+
+def on_starting(server):
+    """Очищает метрики процессов, оставшиеся от прошлого запуска."""
+    path = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,9 @@
+from django.contrib import admin
+from jobs.models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'name', 'status', 'run_at', 'attempts', 'worker')
+    list_filter = ('status', 'name', )
+    search_fields = ('name', 'key', )
@@ -0,0 +1,53 @@
+import os
+import signal
+import socket
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from jobs.models import Job
+from jobs.queue import run_job, schedule_periodic
+
+from backend.settings import TASK_POLL_INTERVAL, TASK_TIMEOUT
+
+
+class Command(BaseCommand):
+    help = 'Воркер очереди фоновых задач'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--burst', action='store_true',
+            help='выйти, когда в очереди не останется готовых задач'
+        )
+        parser.add_argument(
+            '--sleep', type=float, default=TASK_POLL_INTERVAL,
+            help='пауза между опросами пустой очереди, в секундах'
+        )
+
+    def stop(self, signum, frame):
+        self.running = False
+
+    def handle(self, *args, **options):
+        worker = f'{socket.gethostname()}:{os.getpid()}'
+        self.running = True
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        schedule_periodic()
+        checked_stale = 0
+        processed = 0
+        while self.running:
+            close_old_connections()
+            if time.monotonic() - checked_stale > TASK_TIMEOUT / 2:
+                Job.objects.requeue_stale()
+                checked_stale = time.monotonic()
+            job = Job.objects.claim(worker)
+            if job is not None:
+                run_job(job)
+                processed += 1
+            elif options['burst']:
+                break
+            else:
+                time.sleep(options['sleep'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Воркер остановлен, выполнено задач: {processed}'
+        ))
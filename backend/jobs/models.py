@@ -0,0 +1,152 @@
+from datetime import timedelta
+
+from django.db import connections, models, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from backend.settings import TASK_MAX_ATTEMPTS, TASK_TIMEOUT
+
+CLAIM_CANDIDATES = 10
+
+
+class JobQuerySet(models.QuerySet):
+    def due(self):
+        return self.filter(
+            status=Job.QUEUED, run_at__lte=timezone.now()
+        ).order_by('run_at', 'pk')
+
+    def claim(self, worker):
+        """Захватывает одну готовую к запуску задачу для воркера.
+
+        На PostgreSQL строки-кандидаты выбираются с FOR UPDATE SKIP LOCKED,
+        так что воркеры не ждут друг друга. На SQLite, где блокировок строк
+        нет, задачу закрепляет условный UPDATE по статусу: из нескольких
+        воркеров его выполнит только один.
+        """
+        due = self.due()
+        skip_locked = connections[
+            self.db
+        ].features.has_select_for_update_skip_locked
+        with transaction.atomic(using=self.db):
+            if skip_locked:
+                candidates = due.select_for_update(skip_locked=True)[:1]
+            else:
+                candidates = due[:CLAIM_CANDIDATES]
+            for pk in list(candidates.values_list('pk', flat=True)):
+                claimed = self.filter(pk=pk, status=Job.QUEUED).update(
+                    status=Job.RUNNING,
+                    worker=worker,
+                    started_at=timezone.now(),
+                    attempts=F('attempts') + 1,
+                )
+                if claimed:
+                    return self.get(pk=pk)
+        return None
+
+    def requeue_stale(self):
+        """Возвращает в очередь задачи воркеров, завершившихся аварийно.
+
+        Задачи, исчерпавшие попытки, переводятся в failed, чтобы задача,
+        которая роняет воркер, не перезапускалась бесконечно.
+        """
+        stale = self.filter(
+            status=Job.RUNNING,
+            started_at__lt=timezone.now() - timedelta(seconds=TASK_TIMEOUT),
+        )
+        with transaction.atomic(using=self.db):
+            failed = stale.filter(attempts__gte=F('max_attempts')).update(
+                status=Job.FAILED,
+                worker='',
+                last_error='Воркер не завершил задачу за отведённое время',
+            )
+            return failed + stale.update(status=Job.QUEUED, worker='')
+
+
+class Job(models.Model):
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (FAILED, 'Ошибка'),
+    )
+
+    name = models.CharField(
+        verbose_name="Задача",
+        max_length=200,
+    )
+    args = models.JSONField(
+        verbose_name="Позиционные аргументы",
+        default=list,
+    )
+    kwargs = models.JSONField(
+        verbose_name="Именованные аргументы",
+        default=dict,
+    )
+    key = models.CharField(
+        verbose_name="Ключ уникальности",
+        max_length=200,
+        null=True,
+        blank=True,
+    )
+    status = models.CharField(
+        verbose_name="Статус",
+        max_length=16,
+        choices=STATUSES,
+        default=QUEUED,
+    )
+    run_at = models.DateTimeField(
+        verbose_name="Запустить не раньше",
+        default=timezone.now,
+    )
+    attempts = models.PositiveSmallIntegerField(
+        verbose_name="Попыток",
+        default=0,
+    )
+    max_attempts = models.PositiveSmallIntegerField(
+        verbose_name="Максимум попыток",
+        default=TASK_MAX_ATTEMPTS,
+    )
+    worker = models.CharField(
+        verbose_name="Воркер",
+        max_length=200,
+        blank=True,
+    )
+    started_at = models.DateTimeField(
+        verbose_name="Начало выполнения",
+        null=True,
+        blank=True,
+    )
+    last_error = models.TextField(
+        verbose_name="Последняя ошибка",
+        blank=True,
+    )
+    created_at = models.DateTimeField(
+        verbose_name="Дата создания",
+        auto_now_add=True,
+    )
+
+    objects = JobQuerySet.as_manager()
+
+    class Meta:
+        ordering = ('run_at', 'id')
+        verbose_name = 'Фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+        indexes = (
+            models.Index(
+                fields=('run_at', 'id'),
+                condition=Q(status='queued'),
+                name='job_queued_run_at_idx',
+            ),
+        )
+        constraints = (
+            models.UniqueConstraint(
+                fields=('key',),
+                condition=~Q(status='failed'),
+                name='unique_active_job_key',
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.name} ({self.status})'
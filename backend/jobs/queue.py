@@ -0,0 +1,112 @@
+import logging
+import traceback
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from jobs.models import Job
+
+from backend.settings import TASK_MAX_ATTEMPTS, TASK_RETRY_DELAY
+
+logger = logging.getLogger(__name__)
+
+registry = {}
+
+
+class Task:
+    """Функция, которую можно поставить в очередь фоновых задач."""
+
+    def __init__(self, func, max_attempts=TASK_MAX_ATTEMPTS, every=None):
+        self.func = func
+        self.name = f'{func.__module__}.{func.__qualname__}'
+        self.max_attempts = max_attempts
+        self.every = every
+        registry[self.name] = self
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def enqueue(self, *args, delay=0, key=None, **kwargs):
+        """Создаёт задачу; в транзакции она станет видна после коммита.
+
+        Если задача с таким key уже ждёт или выполняется, новая
+        не создаётся.
+        """
+        job = Job(
+            name=self.name,
+            args=list(args),
+            kwargs=kwargs,
+            key=key,
+            run_at=timezone.now() + timedelta(seconds=delay),
+            max_attempts=self.max_attempts,
+        )
+        if key is None:
+            job.save()
+            return job
+        try:
+            with transaction.atomic():
+                job.save()
+        except IntegrityError:
+            return None
+        return job
+
+
+def task(func=None, *, max_attempts=TASK_MAX_ATTEMPTS, every=None):
+    """Регистрирует функцию как фоновую задачу.
+
+    every — период в секундах для задач, которые воркер запускает
+    по расписанию сам.
+    """
+    if func is None:
+        return lambda func: Task(func, max_attempts, every)
+    return Task(func, max_attempts, every)
+
+
+def schedule_periodic():
+    for name, periodic in registry.items():
+        if periodic.every is not None:
+            periodic.enqueue(key=name)
+
+
+def run_job(job):
+    """Выполняет захваченную задачу и решает её дальнейшую судьбу.
+
+    Успешные задачи удаляются, периодические переносятся на следующий
+    запуск. После ошибки задача откладывается с экспоненциальной
+    задержкой, а исчерпав попытки, остаётся в статусе failed.
+    """
+    current = registry.get(job.name)
+    try:
+        if current is None:
+            raise LookupError(f'Задача {job.name} не зарегистрирована')
+        current(*job.args, **job.kwargs)
+    except Exception:
+        logger.exception('Задача %s #%s завершилась ошибкой', job.name, job.pk)
+        job.last_error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            job.status = Job.QUEUED
+            job.run_at = timezone.now() + timedelta(
+                seconds=TASK_RETRY_DELAY * 2 ** (job.attempts - 1)
+            )
+        elif current is not None and current.every is not None:
+            job.status = Job.QUEUED
+            job.attempts = 0
+            job.run_at = timezone.now() + timedelta(seconds=current.every)
+        else:
+            job.status = Job.FAILED
+        job.worker = ''
+        job.save(update_fields=(
+            'status', 'run_at', 'attempts', 'worker', 'last_error'
+        ))
+        return False
+    if current.every is not None:
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.QUEUED,
+            attempts=0,
+            worker='',
+            last_error='',
+            run_at=timezone.now() + timedelta(seconds=current.every),
+        )
+    else:
+        Job.objects.filter(pk=job.pk).delete()
+    return True
@@ -0,0 +1,74 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+from jobs.models import Job
+from jobs.queue import run_job, task
+
+from backend.settings import TASK_TIMEOUT
+
+calls = []
+
+
+@task(max_attempts=2)
+def record(value):
+    calls.append(value)
+
+
+@task(max_attempts=2)
+def fail():
+    raise ValueError('ошибка')
+
+
+class QueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_claim_runs_due_job_once(self):
+        job = record.enqueue(1)
+        record.enqueue(2, delay=60)
+        claimed = Job.objects.claim('worker-1')
+        self.assertEqual(claimed.pk, job.pk)
+        self.assertEqual(claimed.status, Job.RUNNING)
+        self.assertEqual(claimed.attempts, 1)
+        self.assertIsNone(Job.objects.claim('worker-2'))
+        self.assertTrue(run_job(claimed))
+        self.assertEqual(calls, [1])
+        self.assertFalse(Job.objects.filter(pk=job.pk).exists())
+
+    def test_key_deduplicates_active_jobs(self):
+        self.assertIsNotNone(record.enqueue(1, key='record'))
+        self.assertIsNone(record.enqueue(2, key='record'))
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_retry_then_fail(self):
+        job = fail.enqueue()
+        with self.assertLogs('jobs.queue'):
+            self.assertFalse(run_job(Job.objects.claim('worker')))
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.QUEUED)
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertIn('ValueError', job.last_error)
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        with self.assertLogs('jobs.queue'):
+            self.assertFalse(run_job(Job.objects.claim('worker')))
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.attempts, 2)
+
+    def test_requeue_stale(self):
+        retried = record.enqueue(1)
+        exhausted = record.enqueue(2)
+        for _ in range(2):
+            Job.objects.claim('worker')
+        Job.objects.filter(pk=exhausted.pk).update(attempts=2)
+        Job.objects.update(
+            started_at=timezone.now() - timedelta(seconds=TASK_TIMEOUT + 1)
+        )
+        self.assertEqual(Job.objects.requeue_stale(), 2)
+        retried.refresh_from_db()
+        exhausted.refresh_from_db()
+        self.assertEqual(retried.status, Job.QUEUED)
+        self.assertEqual(retried.worker, '')
+        self.assertEqual(exhausted.status, Job.FAILED)
+        self.assertTrue(exhausted.last_error)
@@ -1,6 +1,7 @@
 from django.contrib import admin
 from recipes.models import (Favorite, Ingredient, IngredientAmount, Recipe,
-                            ShoppingCart, Tag)
+                            ShoppingCart, ShoppingListItem, Tag)
+from users.models import User
 from import_export.admin import ImportExportModelAdmin
 
 
@@ -38,11 +39,40 @@ class RecipeAdmin(admin.ModelAdmin):
 
     in_favorites.short_description = 'Добавлен в избранное'
 
+    def save_model(self, request, obj, form, change):
+        if change:
+            ShoppingListItem.objects.lock_recipe(obj)
+        super().save_model(request, obj, form, change)
+
+    def save_related(self, request, form, formsets, change):
+        """Переносит правку ингредиентов в списки покупок."""
+        recipe = form.instance
+        before = ShoppingListItem.objects.get_ingredient_totals(recipe)
+        super().save_related(request, form, formsets, change)
+        after = ShoppingListItem.objects.get_ingredient_totals(recipe)
+        changes = {
+            ingredient: after.get(ingredient, 0) - before.get(ingredient, 0)
+            for ingredient in before.keys() | after.keys()
+        }
+        changes = {key: value for key, value in changes.items() if value}
+        if changes:
+            ShoppingListItem.objects.apply_ingredient_changes(recipe, changes)
+
 
 @admin.register(IngredientAmount)
 class RecipeIngredientAdmin(admin.ModelAdmin):
+    """Только просмотр: ингредиенты меняются в карточке рецепта."""
+
     list_display = ('id', 'recipe', 'ingredient', 'amount')
-    list_editable = ('recipe', 'ingredient', 'amount')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
 
 
 @admin.register(Favorite)
@@ -53,5 +83,23 @@ class FavoriteAdmin(admin.ModelAdmin):
 
 @admin.register(ShoppingCart)
 class ShoppingCartAdmin(admin.ModelAdmin):
+    """Корзина меняется только через менеджер, вместе со списком покупок."""
+
     list_display = ('id', 'user', 'recipe', )
     search_fields = ('user', 'recipe', )
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def save_model(self, request, obj, form, change):
+        ShoppingCart.objects.add_recipes(obj.user, [obj.recipe])
+        obj.pk = ShoppingCart.objects.get(user=obj.user, recipe=obj.recipe).pk
+
+    def delete_model(self, request, obj):
+        ShoppingCart.objects.remove_recipes(obj.user, [obj.recipe_id])
+
+    def delete_queryset(self, request, queryset):
+        for user in User.objects.filter(pk__in=queryset.values('user')):
+            ShoppingCart.objects.remove_recipes(user, list(
+                queryset.filter(user=user).values_list('recipe', flat=True)
+            ))
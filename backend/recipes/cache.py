@@ -0,0 +1,51 @@
+import threading
+from uuid import uuid4
+
+from django.core.cache import caches
+from recipes.models import Tag
+
+
+class VersionedCache:
+    """Данные, закэшированные в памяти процесса.
+
+    Версия данных хранится в общем кэше versions, который не вычищается
+    при переполнении, в отличие от кэша по умолчанию. После вызова invalidate()
+    каждый воркер при следующем обращении заново строит данные через loader.
+    """
+
+    def __init__(self, key, loader):
+        self.version_key = f'{key}:version'
+        self.loader = loader
+        self._lock = threading.Lock()
+        self._version = None
+        self._value = None
+
+    @property
+    def cache(self):
+        return caches['versions']
+
+    def get_version(self):
+        version = self.cache.get(self.version_key)
+        if version is None:
+            self.cache.add(self.version_key, uuid4().hex, None)
+            version = self.cache.get(self.version_key)
+        return version
+
+    def get(self):
+        version = self.get_version()
+        if version != self._version:
+            with self._lock:
+                if version != self._version:
+                    self._value = self.loader()
+                    self._version = version
+        return self._value
+
+    def invalidate(self):
+        self.cache.set(self.version_key, uuid4().hex, None)
+
+
+def load_tags():
+    return list(Tag.objects.values('id', 'name', 'color', 'slug'))
+
+
+tag_cache = VersionedCache('tags', load_tags)
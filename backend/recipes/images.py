@@ -0,0 +1,73 @@
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from PIL import Image, ImageOps
+from recipes.models import Recipe
+
+from backend.settings import (IMAGE_VARIANT_FORMATS, IMAGE_VARIANT_QUALITY,
+                              IMAGE_VARIANT_SIZES, IMAGE_VARIANTS_DIR)
+
+FALLBACK_FORMAT = 'JPEG'
+
+EXTENSIONS = {'JPEG': 'jpg', 'WEBP': 'webp', 'AVIF': 'avif'}
+
+
+def get_formats():
+    """JPEG и те форматы из настроек, которые умеет сохранять Pillow."""
+    Image.init()
+    return [FALLBACK_FORMAT] + [
+        image_format for image_format in IMAGE_VARIANT_FORMATS
+        if image_format in Image.SAVE
+    ]
+
+
+def encode(image, size, image_format):
+    variant = image.copy()
+    variant.thumbnail(size, Image.LANCZOS)
+    if image_format == FALLBACK_FORMAT:
+        variant = variant.convert('RGB')
+    elif variant.mode not in ('RGB', 'RGBA'):
+        variant = variant.convert('RGBA')
+    buffer = BytesIO()
+    variant.save(buffer, image_format, quality=IMAGE_VARIANT_QUALITY)
+    return buffer.getvalue()
+
+
+def generate_image_variants(recipe_id):
+    """Сохраняет уменьшенные копии изображения рецепта без метаданных.
+
+    Копии записываются в image_variants вместе с именем исходного файла,
+    только если изображение не успели заменить, пока они строились.
+    Иначе копии строятся заново для нового изображения: новая задача
+    для рецепта не ставится, пока выполняется текущая. Файлы копий могут
+    быть общими для нескольких рецептов, поэтому устаревшие копии
+    удаляет только команда clean_media.
+    """
+    while True:
+        recipe = Recipe.objects.filter(pk=recipe_id).only(
+            'image', 'image_variants'
+        ).first()
+        if recipe is None or not recipe.image:
+            return
+        source = recipe.image.name
+        if recipe.image_variants.get('source') == source:
+            return
+        with recipe.image.open('rb') as file:
+            image = Image.open(file)
+            image.draft('RGB', max(IMAGE_VARIANT_SIZES.values()))
+            image = ImageOps.exif_transpose(image)
+        image.info = {}
+        variants = {'source': source}
+        for name, size in IMAGE_VARIANT_SIZES.items():
+            variants[name] = {}
+            for image_format in get_formats():
+                variants[name][image_format.lower()] = default_storage.save(
+                    f'{IMAGE_VARIANTS_DIR}/{name}.{EXTENSIONS[image_format]}',
+                    ContentFile(encode(image, size, image_format)),
+                )
+        if Recipe.objects.filter(pk=recipe_id, image=source).update(
+            image_variants=variants, updated_at=timezone.now()
+        ):
+            return
@@ -0,0 +1,44 @@
+from bisect import bisect_left
+
+from recipes.cache import VersionedCache
+from recipes.models import Ingredient
+
+
+class IngredientIndex:
+    """Отсортированный индекс названий ингредиентов для поиска по префиксу."""
+
+    def __init__(self, ingredients):
+        rows = sorted(
+            (name.casefold(), name, measurement_unit, pk)
+            for pk, name, measurement_unit in ingredients
+        )
+        self._keys = [row[0] for row in rows]
+        self._items = [
+            {'id': pk, 'name': name, 'measurement_unit': measurement_unit}
+            for _, name, measurement_unit, pk in rows
+        ]
+
+    def __len__(self):
+        return len(self._items)
+
+    def search(self, prefix, limit):
+        """Ингредиенты, названия которых начинаются с prefix.
+
+        Точное совпадение с prefix в отсортированном индексе всегда идёт
+        первым, поэтому отдельная сортировка по релевантности не нужна.
+        """
+        prefix = prefix.casefold()
+        start = end = bisect_left(self._keys, prefix)
+        stop = min(start + limit, len(self._keys))
+        while end < stop and self._keys[end].startswith(prefix):
+            end += 1
+        return self._items[start:end]
+
+
+def build_ingredient_index():
+    return IngredientIndex(
+        Ingredient.objects.values_list('id', 'name', 'measurement_unit')
+    )
+
+
+ingredient_index = VersionedCache('ingredient-index', build_ingredient_index)
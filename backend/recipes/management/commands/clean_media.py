@@ -0,0 +1,63 @@
+import os
+import time
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from recipes.models import Recipe
+
+from backend.settings import IMAGE_VARIANTS_DIR, MEDIA_CLEANUP_GRACE_PERIOD
+
+
+class Command(BaseCommand):
+    help = 'Удаление изображений, на которые не ссылается ни один рецепт'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='только вывести файлы, которые будут удалены'
+        )
+        parser.add_argument(
+            '--grace-period', type=int, default=MEDIA_CLEANUP_GRACE_PERIOD,
+            help='не трогать файлы моложе указанного числа секунд'
+        )
+
+    def get_referenced_names(self):
+        names = set()
+        for image, variants in Recipe.objects.values_list(
+            'image', 'image_variants'
+        ).iterator():
+            names.add(image)
+            for name, paths in variants.items():
+                if name != 'source':
+                    names.update(paths.values())
+        return names
+
+    def get_stored_names(self):
+        directories = {
+            os.path.dirname(Recipe._meta.get_field('image').upload_to),
+            IMAGE_VARIANTS_DIR,
+        }
+        for directory in directories:
+            if not default_storage.exists(directory):
+                continue
+            for filename in default_storage.listdir(directory)[1]:
+                yield os.path.join(directory, filename)
+
+    def handle(self, *args, **options):
+        # Список файлов снимается до ссылок: файл, загруженный между
+        # двумя шагами, уже попадёт под grace period.
+        stored = list(self.get_stored_names())
+        referenced = self.get_referenced_names()
+        deadline = time.time() - options['grace_period']
+        removed = 0
+        for name in stored:
+            if name in referenced:
+                continue
+            if os.path.getmtime(default_storage.path(name)) > deadline:
+                continue
+            self.stdout.write(name)
+            if not options['dry_run']:
+                default_storage.delete(name)
+            removed += 1
+        verb = 'Будет удалено' if options['dry_run'] else 'Удалено'
+        self.stdout.write(self.style.SUCCESS(f'{verb} файлов: {removed}'))
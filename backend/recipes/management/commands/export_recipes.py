@@ -0,0 +1,79 @@
+import json
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from recipes.models import IngredientAmount, Recipe
+
+from backend.settings import RECIPES_TRANSFER_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Выгрузка рецептов в JSONL, по одному рецепту на строку'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='файл для выгрузки')
+        parser.add_argument(
+            '--batch-size', type=int, default=RECIPES_TRANSFER_BATCH_SIZE
+        )
+
+    def get_batches(self, batch_size):
+        """Отдаёт рецепты пачками по возрастанию id.
+
+        На пачку приходится три запроса: рецепты, теги и ингредиенты.
+        Ингредиенты и теги выгружаются естественными ключами, авторы —
+        по email, чтобы файл можно было загрузить в другую базу.
+        """
+        last_id = 0
+        while True:
+            recipes = list(Recipe.objects.filter(pk__gt=last_id).order_by(
+                'pk'
+            ).values(
+                'id', 'name', 'text', 'cooking_time', 'image',
+                'pub_date', 'updated_at', 'author__email',
+            )[:batch_size])
+            if not recipes:
+                return
+            ids = [recipe['id'] for recipe in recipes]
+            tags = defaultdict(list)
+            for recipe_id, slug in Recipe.tags.through.objects.filter(
+                recipe_id__in=ids
+            ).values_list('recipe_id', 'tag__slug'):
+                tags[recipe_id].append(slug)
+            ingredients = defaultdict(list)
+            for recipe_id, *ingredient in IngredientAmount.objects.filter(
+                recipe_id__in=ids
+            ).values_list(
+                'recipe_id', 'ingredient__name',
+                'ingredient__measurement_unit', 'amount',
+            ):
+                ingredients[recipe_id].append(ingredient)
+            yield [
+                {
+                    'id': recipe['id'],
+                    'name': recipe['name'],
+                    'text': recipe['text'],
+                    'cooking_time': recipe['cooking_time'],
+                    'image': recipe['image'] or None,
+                    'pub_date': recipe['pub_date'].isoformat(),
+                    'updated_at': recipe['updated_at'].isoformat(),
+                    'author': recipe['author__email'],
+                    'tags': tags[recipe['id']],
+                    'ingredients': ingredients[recipe['id']],
+                }
+                for recipe in recipes
+            ]
+            last_id = ids[-1]
+
+    def handle(self, *args, **options):
+        exported = 0
+        with open(options['path'], 'w', encoding='utf-8') as file:
+            for batch in self.get_batches(options['batch_size']):
+                file.writelines(
+                    json.dumps(recipe, ensure_ascii=False) + '\n'
+                    for recipe in batch
+                )
+                exported += len(batch)
+                self.stdout.write(f'Выгружено рецептов: {exported}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Рецепты выгружены в {options["path"]}: {exported}'
+        ))
@@ -0,0 +1,203 @@
+import random
+import time
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from recipes.models import (Favorite, Ingredient, IngredientAmount, Recipe,
+                            ShoppingCart, ShoppingListItem, Tag)
+from users.models import Subscribe, User
+
+from backend.settings import GENERATED_DATA_PASSWORD
+
+WORDS = (
+    'борщ', 'салат', 'пирог', 'суп', 'рагу', 'каша', 'омлет', 'плов',
+    'запеканка', 'котлеты', 'блины', 'паста', 'соус', 'десерт', 'хлеб',
+)
+
+
+def zipf_weights(count, exponent=1.1):
+    """Накопленные веса, при которых первые элементы выбираются чаще."""
+    return list(accumulate(1 / rank ** exponent for rank in
+                           range(1, count + 1)))
+
+
+def bulk_create_with_ids(model, objects, batch_size):
+    """bulk_create, после которого у всех объектов заполнен pk.
+
+    SQLite в Django 3.2 не возвращает id из массовой вставки, поэтому
+    id читаются после неё: вставка идёт в одной транзакции, и новые
+    строки получают id подряд после последнего существующего.
+    """
+    if connection.features.can_return_rows_from_bulk_insert:
+        return model.objects.bulk_create(objects, batch_size=batch_size)
+    last = model.objects.order_by('-pk').values_list('pk', flat=True).first()
+    model.objects.bulk_create(objects, batch_size=batch_size)
+    ids = model.objects.filter(pk__gt=last or 0).order_by(
+        'pk'
+    ).values_list('pk', flat=True)
+    for obj, pk in zip(objects, ids):
+        obj.pk = pk
+    return objects
+
+
+class Command(BaseCommand):
+    help = 'Генерация синтетических данных для нагрузочных тестов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--recipes', type=int, default=10000)
+        parser.add_argument('--ingredients-per-recipe', type=int, default=8)
+        parser.add_argument('--favorites-per-user', type=int, default=20)
+        parser.add_argument('--cart-per-user', type=int, default=5)
+        parser.add_argument('--subscriptions-per-user', type=int, default=10)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def ensure_catalog(self):
+        if not Tag.objects.exists():
+            Tag.objects.bulk_create(
+                Tag(name=name, color=color, slug=slug)
+                for name, color, slug in (
+                    ('Завтрак', '#E26C2D', 'breakfast'),
+                    ('Обед', '#49B64E', 'lunch'),
+                    ('Ужин', '#8775D2', 'dinner'),
+                )
+            )
+        if not Ingredient.objects.exists():
+            Ingredient.objects.bulk_create(
+                Ingredient(name=f'ингредиент {number}', measurement_unit='г')
+                for number in range(500)
+            )
+        return (
+            list(Tag.objects.values_list('pk', flat=True)),
+            list(Ingredient.objects.values_list('pk', flat=True)),
+        )
+
+    def create_users(self, count, batch_size):
+        start = User.objects.filter(username__startswith='bench_').count()
+        password = make_password(GENERATED_DATA_PASSWORD)
+        return [user.pk for user in bulk_create_with_ids(User, [
+            User(
+                username=f'bench_{number}',
+                email=f'bench_{number}@example.com',
+                first_name='Тест',
+                last_name=f'Пользователь {number}',
+                password=password,
+            )
+            for number in range(start, start + count)
+        ], batch_size)]
+
+    def pick(self, population, weights, count):
+        """Выбирает count разных элементов с учётом весов."""
+        count = min(count, len(population))
+        chosen = set()
+        while len(chosen) < count:
+            chosen.update(self.random.choices(
+                population, cum_weights=weights, k=count - len(chosen)
+            ))
+        return chosen
+
+    def handle(self, *args, **options):
+        """Создаёт пользователей, рецепты и связи с неравномерным спросом.
+
+        Авторы, рецепты и ингредиенты выбираются по закону Ципфа:
+        немногие популярные получают большую часть избранного, корзин
+        и подписок, как в реальных данных.
+        """
+        started = time.monotonic()
+        self.random = random.Random(options['seed'])
+        batch_size = options['batch_size']
+        with transaction.atomic():
+            tags, ingredients = self.ensure_catalog()
+            users = self.create_users(options['users'], batch_size)
+            self.stdout.write(f'Пользователей: {len(users)}')
+            user_weights = zipf_weights(len(users))
+            authors = self.random.choices(
+                users, cum_weights=user_weights, k=options['recipes']
+            )
+            recipes = [recipe.pk for recipe in bulk_create_with_ids(Recipe, [
+                Recipe(
+                    author_id=author,
+                    name=' '.join(self.random.sample(WORDS, 2)).capitalize(),
+                    text=' '.join(self.random.choices(WORDS, k=20)),
+                    cooking_time=self.random.randint(5, 180),
+                )
+                for author in authors
+            ], batch_size)]
+            self.stdout.write(f'Рецептов: {len(recipes)}')
+            ingredient_weights = zipf_weights(len(ingredients))
+            amounts = []
+            recipe_tags = []
+            for recipe in recipes:
+                for ingredient in self.pick(
+                    ingredients, ingredient_weights,
+                    self.random.randint(
+                        1, options['ingredients_per_recipe'] * 2 - 1
+                    ),
+                ):
+                    amounts.append(IngredientAmount(
+                        recipe_id=recipe,
+                        ingredient_id=ingredient,
+                        amount=self.random.randint(1, 500),
+                    ))
+                for tag in self.random.sample(
+                    tags, self.random.randint(1, len(tags))
+                ):
+                    recipe_tags.append(Recipe.tags.through(
+                        recipe_id=recipe, tag_id=tag
+                    ))
+            IngredientAmount.objects.bulk_create(
+                amounts, batch_size=batch_size
+            )
+            Recipe.tags.through.objects.bulk_create(
+                recipe_tags, batch_size=batch_size
+            )
+            self.stdout.write(f'Ингредиентов в рецептах: {len(amounts)}')
+            recipe_weights = zipf_weights(len(recipes))
+            favorites = []
+            carts = []
+            subscriptions = []
+            for user in users:
+                favorites.extend(
+                    Favorite(user_id=user, recipe_id=recipe)
+                    for recipe in self.pick(
+                        recipes, recipe_weights,
+                        self.random.randint(
+                            0, options['favorites_per_user'] * 2
+                        ),
+                    )
+                )
+                carts.extend(
+                    ShoppingCart(user_id=user, recipe_id=recipe)
+                    for recipe in self.pick(
+                        recipes, recipe_weights,
+                        self.random.randint(0, options['cart_per_user'] * 2),
+                    )
+                )
+                subscriptions.extend(
+                    Subscribe(user_id=user, author_id=author)
+                    for author in self.pick(
+                        users, user_weights,
+                        self.random.randint(
+                            0, options['subscriptions_per_user'] * 2
+                        ),
+                    )
+                    if author != user
+                )
+            for model, objects in (
+                (Favorite, favorites),
+                (ShoppingCart, carts),
+                (Subscribe, subscriptions),
+            ):
+                model.objects.bulk_create(
+                    objects, batch_size=batch_size, ignore_conflicts=True
+                )
+                self.stdout.write(
+                    f'{model._meta.verbose_name_plural}: {len(objects)}'
+                )
+            ShoppingListItem.objects.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Данные сгенерированы за {time.monotonic() - started:.1f} с'
+        ))
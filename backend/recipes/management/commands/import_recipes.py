@@ -0,0 +1,188 @@
+import json
+import os
+from contextlib import contextmanager
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from recipes.ingredient_index import ingredient_index
+from recipes.models import (Ingredient, IngredientAmount, Recipe,
+                            RecipeImport, Tag)
+from recipes.tasks import process_recipe_image
+from users.models import User
+
+from backend.settings import RECIPES_TRANSFER_BATCH_SIZE
+
+
+@contextmanager
+def keep_timestamps():
+    """Отключает auto_now и auto_now_add, чтобы сохранить даты из файла."""
+    fields = [
+        field for field in Recipe._meta.fields
+        if getattr(field, 'auto_now', False)
+        or getattr(field, 'auto_now_add', False)
+    ]
+    flags = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, flags):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Command(BaseCommand):
+    help = 'Загрузка рецептов из JSONL, выгруженного export_recipes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='файл JSONL')
+        parser.add_argument(
+            '--batch-size', type=int, default=RECIPES_TRANSFER_BATCH_SIZE
+        )
+        parser.add_argument(
+            '--restart', action='store_true',
+            help='начать загрузку сначала, не учитывая сохранённую позицию'
+        )
+
+    def read_batches(self, file, batch_size):
+        """Отдаёт пачки записей вместе с позицией в файле после пачки."""
+        offset = file.tell()
+        lines = iter(file.readline, b'')
+        while True:
+            batch = []
+            for line in islice(lines, batch_size):
+                offset += len(line)
+                if line.strip():
+                    batch.append(json.loads(line))
+            if not batch:
+                return
+            yield batch, offset
+
+    def create_missing_ingredients(self, batch):
+        keys = {
+            (name, measurement_unit)
+            for record in batch
+            for name, measurement_unit, amount in record['ingredients']
+        }
+        missing = keys - self.ingredients.keys()
+        if missing:
+            Ingredient.objects.bulk_create(
+                [Ingredient(name=name, measurement_unit=unit)
+                 for name, unit in missing],
+                ignore_conflicts=True,
+            )
+            # bulk_create не отправляет сигналы, поэтому индекс для
+            # автодополнения сбрасывается вручную после коммита пачки.
+            transaction.on_commit(ingredient_index.invalidate)
+            names = {name for name, unit in missing}
+            for pk, name, unit in Ingredient.objects.filter(
+                name__in=names
+            ).values_list('pk', 'name', 'measurement_unit'):
+                self.ingredients[name, unit] = pk
+
+    def create_recipes(self, recipes):
+        if connection.features.can_return_rows_from_bulk_insert:
+            return Recipe.objects.bulk_create(recipes)
+        for recipe in recipes:
+            recipe.save()
+        return recipes
+
+    def import_batch(self, batch):
+        self.create_missing_ingredients(batch)
+        authors = dict(User.objects.filter(
+            email__in={record['author'] for record in batch}
+        ).values_list('email', 'pk'))
+        now = timezone.now()
+        recipes = self.create_recipes([
+            Recipe(
+                name=record['name'],
+                text=record['text'],
+                cooking_time=record['cooking_time'],
+                image=record.get('image') or None,
+                author_id=authors.get(record['author']),
+                pub_date=parse_datetime(record.get('pub_date') or '') or now,
+                updated_at=parse_datetime(
+                    record.get('updated_at') or ''
+                ) or now,
+            )
+            for record in batch
+        ])
+        tags = []
+        amounts = []
+        for recipe, record in zip(recipes, batch):
+            self.missing_authors += recipe.author_id is None
+            for slug in record['tags']:
+                if slug in self.tags:
+                    tags.append(Recipe.tags.through(
+                        recipe_id=recipe.pk, tag_id=self.tags[slug]
+                    ))
+                else:
+                    self.missing_tags.add(slug)
+            for name, unit, amount in record['ingredients']:
+                amounts.append(IngredientAmount(
+                    recipe_id=recipe.pk,
+                    ingredient_id=self.ingredients[name, unit],
+                    amount=amount,
+                ))
+        Recipe.tags.through.objects.bulk_create(tags)
+        IngredientAmount.objects.bulk_create(amounts)
+        # bulk_create не отправляет post_save, поэтому копии изображений
+        # заказываются явно; на SQLite рецепты сохраняются по одному,
+        # и задачу от сигнала отсекает тот же ключ.
+        for recipe in recipes:
+            if recipe.image:
+                process_recipe_image.enqueue(
+                    recipe.pk, key=f'recipe-image:{recipe.pk}'
+                )
+
+    def handle(self, *args, **options):
+        """Загружает рецепты пачками, каждую в своей транзакции.
+
+        Позиция в файле сохраняется в RecipeImport в той же транзакции,
+        что и пачка, и прерванную загрузку можно продолжить повторным
+        запуском.
+        """
+        path = os.path.abspath(options['path'])
+        if options['restart']:
+            RecipeImport.objects.filter(path=path).delete()
+        progress = RecipeImport.objects.get_or_create(path=path)[0]
+        offset, imported = progress.offset, progress.imported
+        if offset:
+            self.stdout.write(f'Продолжение с рецепта {imported + 1}')
+        self.tags = dict(Tag.objects.values_list('slug', 'pk'))
+        self.ingredients = {
+            (name, unit): pk
+            for pk, name, unit in Ingredient.objects.values_list(
+                'pk', 'name', 'measurement_unit'
+            )
+        }
+        self.missing_authors = 0
+        self.missing_tags = set()
+        with open(options['path'], 'rb') as file, keep_timestamps():
+            file.seek(offset)
+            for batch, offset in self.read_batches(
+                file, options['batch_size']
+            ):
+                imported += len(batch)
+                with transaction.atomic():
+                    self.import_batch(batch)
+                    RecipeImport.objects.filter(pk=progress.pk).update(
+                        offset=offset, imported=imported,
+                        updated_at=timezone.now(),
+                    )
+                self.stdout.write(f'Загружено рецептов: {imported}')
+        progress.delete()
+        if self.missing_authors:
+            self.stdout.write(self.style.WARNING(
+                f'Рецептов без найденного автора: {self.missing_authors}'
+            ))
+        if self.missing_tags:
+            self.stdout.write(self.style.WARNING(
+                f'Пропущены неизвестные теги: {sorted(self.missing_tags)}'
+            ))
+        self.stdout.write(self.style.SUCCESS(
+            f'Рецепты загружены: {imported}'
+        ))
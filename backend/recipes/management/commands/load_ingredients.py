@@ -0,0 +1,167 @@
+import csv
+import io
+import json
+import os
+import re
+import time
+from itertools import chain, islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from recipes.ingredient_index import ingredient_index
+from recipes.models import Ingredient
+
+from backend.settings import INGREDIENTS_DATA_PATH, INGREDIENTS_LOAD_BATCH_SIZE
+
+HEADER = ('name', 'measurement_unit')
+
+SEPARATORS = re.compile(r'[\s,]*')
+
+
+def read_csv(file):
+    for row in csv.reader(file):
+        if row and tuple(row) != HEADER:
+            yield row
+
+
+def iter_json_array(file, chunk_size=64 * 1024):
+    """Отдаёт элементы массива JSON по одному, читая файл кусками."""
+    decoder = json.JSONDecoder()
+    buffer = file.read(chunk_size).lstrip()
+    if not buffer.startswith('['):
+        raise CommandError('Ожидался массив JSON')
+    position = 1
+    while True:
+        position = SEPARATORS.match(buffer, position).end()
+        if buffer.startswith(']', position):
+            return
+        try:
+            item, position = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            # Элемент обрывается на границе прочитанного куска.
+            chunk = file.read(chunk_size)
+            if not chunk:
+                raise CommandError('Файл JSON оборван или повреждён')
+            buffer, position = buffer[position:] + chunk, 0
+            continue
+        yield item
+
+
+def read_json(file):
+    for item in iter_json_array(file):
+        if isinstance(item, dict):
+            yield item.get('name'), item.get('measurement_unit')
+        else:
+            yield ()
+
+
+READERS = {'.csv': read_csv, '.json': read_json}
+
+
+class Command(BaseCommand):
+    help = 'Загрузка справочника ингредиентов из csv или json'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'paths', nargs='*', default=(INGREDIENTS_DATA_PATH,),
+            help='файлы .csv или .json; по умолчанию INGREDIENTS_DATA_PATH'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=INGREDIENTS_LOAD_BATCH_SIZE
+        )
+
+    def read_rows(self, path):
+        extension = os.path.splitext(str(path))[1].lower()
+        if extension not in READERS:
+            raise CommandError(f'Неизвестный формат файла: {path}')
+        name_length = Ingredient._meta.get_field('name').max_length
+        unit_length = Ingredient._meta.get_field(
+            'measurement_unit'
+        ).max_length
+        with open(path, encoding='utf-8') as file:
+            for row in READERS[extension](file):
+                if len(row) != 2 or not all(
+                    isinstance(value, str) for value in row
+                ):
+                    self.skipped += 1
+                    continue
+                name, measurement_unit = (value.strip() for value in row)
+                if (not name or len(name) > name_length
+                        or len(measurement_unit) > unit_length):
+                    self.skipped += 1
+                    continue
+                yield name, measurement_unit
+
+    def batches(self, rows, batch_size):
+        rows = iter(rows)
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                return
+            self.read += len(batch)
+            yield batch
+            self.stdout.write(f'Прочитано строк: {self.read}')
+
+    def copy_batches(self, batches):
+        """Загружает строки через COPY во временную таблицу.
+
+        Новые ингредиенты переносятся в справочник одним INSERT ... SELECT,
+        уже существующие пары (name, measurement_unit) пропускаются.
+        """
+        table = Ingredient._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'CREATE TEMPORARY TABLE ingredient_staging '
+                '(name text, measurement_unit text) ON COMMIT DROP'
+            )
+            for batch in batches:
+                buffer = io.StringIO()
+                csv.writer(buffer).writerows(batch)
+                buffer.seek(0)
+                cursor.copy_expert(
+                    'COPY ingredient_staging FROM STDIN WITH (FORMAT csv)',
+                    buffer,
+                )
+            cursor.execute(
+                f'INSERT INTO {table} (name, measurement_unit) '
+                'SELECT DISTINCT name, measurement_unit '
+                'FROM ingredient_staging '
+                'ON CONFLICT (name, measurement_unit) DO NOTHING'
+            )
+            return cursor.rowcount
+
+    def create_batches(self, batches):
+        before = Ingredient.objects.count()
+        for batch in batches:
+            Ingredient.objects.bulk_create(
+                [
+                    Ingredient(name=name, measurement_unit=measurement_unit)
+                    for name, measurement_unit in batch
+                ],
+                ignore_conflicts=True,
+            )
+        return Ingredient.objects.count() - before
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        self.read = 0
+        self.skipped = 0
+        rows = chain.from_iterable(
+            self.read_rows(path) for path in options['paths']
+        )
+        batches = self.batches(rows, options['batch_size'])
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                created = self.copy_batches(batches)
+            else:
+                created = self.create_batches(batches)
+        if created:
+            ingredient_index.invalidate()
+        if self.skipped:
+            self.stdout.write(self.style.WARNING(
+                f'Пропущено некорректных строк: {self.skipped}'
+            ))
+        self.stdout.write(self.style.SUCCESS(
+            f'Ингредиенты загружены: добавлено {created} '
+            f'из {self.read} за {time.monotonic() - started:.2f} с'
+        ))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from recipes.models import ShoppingListItem
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = 'Пересчёт списков покупок по содержимому корзин'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user', type=int, help='id пользователя; по умолчанию все'
+        )
+
+    def handle(self, *args, **options):
+        user = None
+        if options['user'] is not None:
+            user = User.objects.get(pk=options['user'])
+        ShoppingListItem.objects.rebuild(user)
+        self.stdout.write(self.style.SUCCESS('Списки покупок пересчитаны!'))
@@ -0,0 +1,69 @@
+# Generated by Django 3.2.25 on 2026-10-17 00:41
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+SEARCH_VECTOR = """
+    setweight(to_tsvector('russian', coalesce({table}.name, '')), 'A') ||
+    setweight(to_tsvector('russian', coalesce({table}.text, '')), 'B')
+"""
+
+FORWARD_SQL = (
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    f"""
+    CREATE OR REPLACE FUNCTION recipes_recipe_search_vector_update()
+    RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector := {SEARCH_VECTOR.format(table='NEW')};
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER recipes_recipe_search_vector_trigger
+    BEFORE INSERT OR UPDATE ON recipes_recipe
+    FOR EACH ROW EXECUTE PROCEDURE recipes_recipe_search_vector_update()
+    """,
+    'UPDATE recipes_recipe SET search_vector = '
+    + SEARCH_VECTOR.format(table='recipes_recipe'),
+    'CREATE INDEX recipes_recipe_search_vector_idx '
+    'ON recipes_recipe USING gin (search_vector)',
+    'CREATE INDEX recipes_recipe_name_trgm_idx '
+    'ON recipes_recipe USING gin (name gin_trgm_ops)',
+)
+
+REVERSE_SQL = (
+    'DROP INDEX IF EXISTS recipes_recipe_name_trgm_idx',
+    'DROP INDEX IF EXISTS recipes_recipe_search_vector_idx',
+    'DROP TRIGGER IF EXISTS recipes_recipe_search_vector_trigger '
+    'ON recipes_recipe',
+    'DROP FUNCTION IF EXISTS recipes_recipe_search_vector_update()',
+)
+
+
+def run_on_postgresql(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0008_auto_20261017_0038'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='Поисковый вектор'),
+        ),
+        migrations.RunPython(
+            run_on_postgresql(FORWARD_SQL),
+            run_on_postgresql(REVERSE_SQL),
+        ),
+    ]
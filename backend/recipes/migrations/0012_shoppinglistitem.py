@@ -0,0 +1,49 @@
+# Generated by Django 3.2.25 on 2026-10-17 00:44
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_shopping_lists(apps, schema_editor):
+    ShoppingListItem = apps.get_model('recipes', 'ShoppingListItem')
+    IngredientAmount = apps.get_model('recipes', 'IngredientAmount')
+    ShoppingCart = apps.get_model('recipes', 'ShoppingCart')
+    schema_editor.execute(
+        f'INSERT INTO {ShoppingListItem._meta.db_table} '
+        '(user_id, ingredient_id, amount) '
+        'SELECT cart.user_id, amount.ingredient_id, SUM(amount.amount) '
+        f'FROM {IngredientAmount._meta.db_table} amount '
+        f'JOIN {ShoppingCart._meta.db_table} cart '
+        'ON cart.recipe_id = amount.recipe_id '
+        'GROUP BY cart.user_id, amount.ingredient_id'
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0011_recipe_pub_date_id_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShoppingListItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.PositiveIntegerField(verbose_name='Количество')),
+                ('ingredient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shopping_list_items', to='recipes.ingredient', verbose_name='Ингредиент')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shopping_list', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Позиция списка покупок',
+                'verbose_name_plural': 'Позиции списков покупок',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='shoppinglistitem',
+            constraint=models.UniqueConstraint(fields=('user', 'ingredient'), name='unique_shopping_list_item'),
+        ),
+        migrations.RunPython(fill_shopping_lists, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,50 @@
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def merge_duplicate_ingredients(apps, schema_editor):
+    """Сливает повторы ингредиентов в запись с наименьшим id.
+
+    Ссылки из рецептов и списков покупок переносятся на оставшуюся
+    запись, количества совпавших строк складываются.
+    """
+    Ingredient = apps.get_model('recipes', 'Ingredient')
+    IngredientAmount = apps.get_model('recipes', 'IngredientAmount')
+    ShoppingListItem = apps.get_model('recipes', 'ShoppingListItem')
+    duplicates = Ingredient.objects.values(
+        'name', 'measurement_unit'
+    ).annotate(count=Count('id'), keep=Min('id')).filter(count__gt=1)
+    for group in duplicates:
+        extra = list(Ingredient.objects.filter(
+            name=group['name'], measurement_unit=group['measurement_unit']
+        ).exclude(pk=group['keep']).values_list('pk', flat=True))
+        for model, owner in (
+            (IngredientAmount, 'recipe_id'),
+            (ShoppingListItem, 'user_id'),
+        ):
+            for row in model.objects.filter(ingredient_id__in=extra):
+                kept = model.objects.filter(
+                    ingredient_id=group['keep'],
+                    **{owner: getattr(row, owner)},
+                ).first()
+                if kept is None:
+                    row.ingredient_id = group['keep']
+                    row.save(update_fields=('ingredient',))
+                else:
+                    kept.amount += row.amount
+                    kept.save(update_fields=('amount',))
+                    row.delete()
+        Ingredient.objects.filter(pk__in=extra).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0014_recipe_image_variants'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            merge_duplicate_ingredients, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 3.2 on 2026-10-17 01:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0016_unique_ingredient_name_unit'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeImport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path', models.CharField(max_length=500, unique=True, verbose_name='Файл')),
+                ('offset', models.PositiveBigIntegerField(default=0, verbose_name='Позиция в файле')),
+                ('imported', models.PositiveIntegerField(default=0, verbose_name='Загружено рецептов')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Обновлено')),
+            ],
+            options={
+                'verbose_name': 'Загрузка рецептов',
+                'verbose_name_plural': 'Загрузки рецептов',
+            },
+        ),
+    ]
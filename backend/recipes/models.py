@@ -1,6 +1,14 @@
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVectorField,
+                                            TrigramSimilarity)
 from django.core import validators
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import connections, models, transaction
+from django.db.models import (BooleanField, Case, Exists, F, IntegerField,
+                              OuterRef, Prefetch, Q, Subquery, Sum, Value,
+                              When, Window)
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Greatest, RowNumber
 from django.db.models.constraints import UniqueConstraint
 from users.models import User
 
@@ -54,11 +62,99 @@ class Ingredient(models.Model):
         verbose_name = 'Ингредиент'
         verbose_name_plural = 'Ингредиенты'
         db_table = 'recipes_ingredient'
+        constraints = (
+            UniqueConstraint(
+                fields=('name', 'measurement_unit'),
+                name='unique_ingredient_name_unit',
+            ),
+        )
 
     def __str__(self):
         return f'{self.name}, {self.measurement_unit}.'
 
 
+class RecipeQuerySet(models.QuerySet):
+
+    def with_related(self):
+        """Подгружает автора, теги и ингредиенты фиксированным числом
+        запросов."""
+        return self.select_related('author').prefetch_related(
+            Prefetch('tags', queryset=Tag.objects.all()),
+            Prefetch(
+                'recipe',
+                queryset=IngredientAmount.objects.select_related('ingredient')
+            ),
+        )
+
+    def latest_per_author(self, authors, limit=None):
+        """Последние рецепты авторов, не больше limit на автора.
+
+        Ограничение применяется оконной функцией ROW_NUMBER() в подзапросе,
+        поэтому рецепты всех авторов выбираются одним запросом.
+        """
+        if not authors:
+            return self.none()
+        queryset = self.filter(author__in=authors)
+        if limit is None:
+            return queryset
+        ranked = queryset.order_by().annotate(
+            author_position=Window(
+                expression=RowNumber(),
+                partition_by=[F('author_id')],
+                order_by=[F('pub_date').desc(), F('id').desc()],
+            )
+        ).values('id', 'author_position')
+        sql, params = ranked.query.get_compiler(
+            connection=connections[self.db]
+        ).as_sql()
+        return self.filter(pk__in=RawSQL(
+            f'SELECT ranked.id FROM ({sql}) AS ranked '
+            'WHERE ranked.author_position <= %s',
+            (*params, limit),
+        ))
+
+    def search(self, value):
+        """Ищет рецепты по названию и описанию, сортируя по релевантности.
+
+        В PostgreSQL используется полнотекстовый поиск по search_vector
+        и триграммное сходство названия для запросов с опечатками.
+        """
+        if connections[self.db].vendor != 'postgresql':
+            return self.filter(
+                Q(name__icontains=value) | Q(text__icontains=value)
+            ).annotate(
+                rank=Case(
+                    When(name__istartswith=value, then=Value(3)),
+                    When(name__icontains=value, then=Value(2)),
+                    default=Value(1),
+                    output_field=IntegerField(),
+                )
+            ).order_by('-rank', '-pub_date')
+        query = SearchQuery(value, config='russian', search_type='websearch')
+        return self.filter(
+            Q(search_vector=query) | Q(name__trigram_similar=value)
+        ).annotate(
+            rank=SearchRank(F('search_vector'), query),
+            similarity=TrigramSimilarity('name', value),
+        ).order_by('-rank', '-similarity', '-pub_date')
+
+    def with_user_flags(self, user):
+        """Аннотирует рецепты флагами избранного и списка покупок."""
+        if not user.is_authenticated:
+            return self.annotate(
+                is_favorited=Value(False, output_field=BooleanField()),
+                is_in_shopping_cart=Value(False, output_field=BooleanField()),
+            )
+        return self.annotate(
+            is_favorited=Exists(Favorite.objects.filter(
+                user=user, recipe=OuterRef('pk')
+            )),
+            is_in_shopping_cart=Exists(ShoppingCart.objects.filter(
+                user=user, recipe=OuterRef('pk')
+            )),
+        )
+
+
 class Recipe(models.Model):
     author = models.ForeignKey(
         User,
@@ -90,6 +186,7 @@ class Recipe(models.Model):
     )
     ingredients = models.ManyToManyField(
         Ingredient,
+        through='IngredientAmount',
         verbose_name="Ингредиенты блюда",
         related_name="recipes",
     )
@@ -103,11 +200,34 @@ class Recipe(models.Model):
         verbose_name="Дата публикации",
         auto_now_add=True,
     )
+    updated_at = models.DateTimeField(
+        verbose_name="Дата изменения",
+        auto_now=True,
+    )
+    search_vector = SearchVectorField(
+        verbose_name="Поисковый вектор",
+        null=True,
+        editable=False,
+    )
+    image_variants = models.JSONField(
+        verbose_name="Уменьшенные копии изображения",
+        default=dict,
+        blank=True,
+        editable=False,
+    )
+
+    objects = RecipeQuerySet.as_manager()
 
     class Meta:
-        ordering = ('-pub_date',)
+        ordering = ('-pub_date', '-id')
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
+        indexes = (
+            models.Index(
+                fields=('-pub_date', '-id'),
+                name='recipe_pub_date_id_idx',
+            ),
+        )
 
     def __str__(self):
         return f'{self.author.email}, {self.name}'
@@ -150,6 +270,79 @@ class IngredientAmount(models.Model):
         return str(self.ingredient)
 
 
+def recipe_ids(recipes):
+    return [int(getattr(recipe, 'pk', recipe)) for recipe in recipes]
+
+
+def lock_rows(queryset):
+    """Блокирует строки до конца транзакции, если база это умеет.
+
+    SQLite пропускает FOR UPDATE, поэтому запрос там не выполняется.
+    """
+    if connections[queryset.db].features.has_select_for_update:
+        list(queryset.select_for_update().values_list('pk', flat=True))
+
+
+class UserRecipeManager(models.Manager):
+    """Массовые операции для связей пользователь — рецепт."""
+
+    def add_recipes(self, user, recipes):
+        """Добавляет связи с рецептами, возвращает id новых рецептов."""
+        ids = recipe_ids(recipes)
+        existing = set(self.filter(
+            user=user, recipe__in=ids
+        ).values_list('recipe_id', flat=True))
+        added = list(dict.fromkeys(pk for pk in ids if pk not in existing))
+        self.bulk_create(
+            [self.model(user=user, recipe_id=pk) for pk in added],
+            ignore_conflicts=True
+        )
+        return added
+
+    def remove_recipes(self, user, recipes=None):
+        """Удаляет связи с рецептами (или все, если recipes=None).
+
+        Возвращает количество удалённых связей.
+        """
+        links = self.filter(user=user)
+        if recipes is not None:
+            links = links.filter(recipe__in=recipe_ids(recipes))
+        deleted, _ = links.delete()
+        return deleted
+
+
+class ShoppingCartManager(UserRecipeManager):
+    """Корзина, изменения которой сразу отражаются в списке покупок."""
+
+    @transaction.atomic
+    def add_recipes(self, user, recipes):
+        User.objects.select_for_update().filter(pk=user.pk).exists()
+        lock_rows(Recipe.objects.filter(
+            pk__in=recipe_ids(recipes)
+        ).order_by('pk'))
+        added = super().add_recipes(user, recipes)
+        ShoppingListItem.objects.add_recipes(added, user)
+        return added
+
+    @transaction.atomic
+    def remove_recipes(self, user, recipes=None):
+        User.objects.select_for_update().filter(pk=user.pk).exists()
+        if recipes is not None:
+            lock_rows(Recipe.objects.filter(
+                pk__in=recipe_ids(recipes)
+            ).order_by('pk'))
+        if recipes is None:
+            ShoppingListItem.objects.filter(user=user).delete()
+        else:
+            ShoppingListItem.objects.remove_recipes(
+                self.filter(
+                    user=user, recipe__in=recipe_ids(recipes)
+                ).values_list('recipe_id', flat=True),
+                user
+            )
+        return super().remove_recipes(user, recipes)
+
+
 class Favorite(models.Model):
     user = models.ForeignKey(
         User,
@@ -164,6 +357,8 @@ class Favorite(models.Model):
         on_delete=models.CASCADE,
     )
 
+    objects = UserRecipeManager()
+
     class Meta:
         ordering = ('recipe',)
         verbose_name = 'Избранное'
@@ -193,6 +388,8 @@ class ShoppingCart(models.Model):
         related_name='recipe_shopping_cart',
     )
 
+    objects = ShoppingCartManager()
+
     class Meta:
         verbose_name = 'Список покупок'
         verbose_name_plural = 'Списки покупок'
@@ -205,3 +402,197 @@ class ShoppingCart(models.Model):
 
     def __str__(self):
         return f'{self.user.username} - {self.recipe.name}'
+
+
+class ShoppingListItemManager(models.Manager):
+
+    def add_recipes(self, recipes=None, user=None):
+        """Прибавляет ингредиенты рецептов к спискам покупок.
+
+        Учитываются только корзины, в которых эти рецепты уже лежат.
+        Без recipes суммируются все рецепты корзин, без user — корзины
+        всех пользователей.
+        """
+        conditions, params = [], []
+        if recipes is not None:
+            ids = recipe_ids(recipes)
+            if not ids:
+                return
+            conditions.append(
+                f'cart.recipe_id IN ({", ".join(["%s"] * len(ids))})'
+            )
+            params.extend(ids)
+        if user is not None:
+            conditions.append('cart.user_id = %s')
+            params.append(user.pk)
+        table = self.model._meta.db_table
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {table} (user_id, ingredient_id, amount) '
+                'SELECT cart.user_id, amount.ingredient_id, '
+                'SUM(amount.amount) '
+                f'FROM {IngredientAmount._meta.db_table} amount '
+                f'JOIN {ShoppingCart._meta.db_table} cart '
+                'ON cart.recipe_id = amount.recipe_id '
+                f'WHERE {" AND ".join(conditions) or "1 = 1"} '
+                'GROUP BY cart.user_id, amount.ingredient_id '
+                'ON CONFLICT (user_id, ingredient_id) DO UPDATE '
+                f'SET amount = {table}.amount + excluded.amount',
+                params,
+            )
+
+    def remove_recipes(self, recipes, user=None):
+        """Вычитает ингредиенты рецептов из списков покупок.
+
+        Вызывается до удаления рецептов из корзин; позиции с нулевым
+        количеством удаляются.
+        """
+        contributions = IngredientAmount.objects.filter(
+            recipe__in=recipes,
+            recipe__recipe_shopping_cart__user=OuterRef('user'),
+            ingredient=OuterRef('ingredient'),
+        ).values('ingredient').annotate(total=Sum('amount')).values('total')
+        items = self.filter(Exists(contributions))
+        if user is not None:
+            items = items.filter(user=user)
+        items.update(amount=Greatest(
+            F('amount') - Subquery(contributions), Value(0)
+        ))
+        empty = self.filter(amount=0)
+        if user is not None:
+            empty = empty.filter(user=user)
+        empty.delete()
+
+    def lock_recipe(self, recipe):
+        """Блокирует списки покупок, которые зависят от рецепта.
+
+        Порядок тот же, что в ShoppingCartManager: сначала пользователи
+        с рецептом в корзине по возрастанию pk, затем сам рецепт. Корзины,
+        в которые рецепт добавляют параллельно, ждут конца транзакции.
+        Вызывается до того, как рецепт или его ингредиенты изменены.
+        """
+        lock_rows(User.objects.filter(
+            pk__in=ShoppingCart.objects.filter(recipe=recipe).values('user')
+        ).order_by('pk'))
+        lock_rows(Recipe.objects.filter(pk=recipe.pk))
+
+    def get_ingredient_totals(self, recipe):
+        """Количество каждого ингредиента рецепта."""
+        return dict(IngredientAmount.objects.filter(recipe=recipe).values(
+            'ingredient'
+        ).annotate(total=Sum('amount')).values_list('ingredient', 'total'))
+
+    def apply_ingredient_changes(self, recipe, changes):
+        """Переносит изменения ингредиентов рецепта в списки покупок.
+
+        changes — словарь {id ингредиента: разница количества}; затрагиваются
+        только пользователи, у которых рецепт лежит в корзине. Вызывается
+        в той же транзакции, что и правка ингредиентов.
+        """
+        self.lock_recipe(recipe)
+        added = [(pk, delta) for pk, delta in changes.items() if delta > 0]
+        removed = {pk: -delta for pk, delta in changes.items() if delta < 0}
+        carts = ShoppingCart.objects.filter(recipe=recipe).values('user')
+        if added:
+            table = self.model._meta.db_table
+            rows = ' UNION ALL '.join(
+                ['SELECT %s AS ingredient_id, %s AS amount'] * len(added)
+            )
+            with connections[self.db].cursor() as cursor:
+                cursor.execute(
+                    f'INSERT INTO {table} (user_id, ingredient_id, amount) '
+                    'SELECT cart.user_id, change.ingredient_id, '
+                    'change.amount '
+                    f'FROM {ShoppingCart._meta.db_table} cart '
+                    f'CROSS JOIN ({rows}) change '
+                    'WHERE cart.recipe_id = %s '
+                    'ON CONFLICT (user_id, ingredient_id) DO UPDATE '
+                    f'SET amount = {table}.amount + excluded.amount',
+                    [value for row in added for value in row] + [recipe.pk],
+                )
+        if removed:
+            self.filter(user__in=carts, ingredient__in=removed).update(
+                amount=Greatest(
+                    F('amount') - Case(
+                        *[
+                            When(ingredient=pk, then=Value(amount))
+                            for pk, amount in removed.items()
+                        ],
+                        output_field=IntegerField(),
+                    ),
+                    Value(0),
+                )
+            )
+            self.filter(user__in=carts, amount=0).delete()
+
+    @transaction.atomic
+    def rebuild(self, user=None):
+        """Пересчитывает списки покупок по содержимому корзин."""
+        items = self.all() if user is None else self.filter(user=user)
+        items.delete()
+        self.add_recipes(user=user)
+
+
+class ShoppingListItem(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='Пользователь',
+        related_name='shopping_list',
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        verbose_name='Ингредиент',
+        related_name='shopping_list_items',
+    )
+    amount = models.PositiveIntegerField(
+        verbose_name='Количество',
+    )
+
+    objects = ShoppingListItemManager()
+
+    class Meta:
+        verbose_name = 'Позиция списка покупок'
+        verbose_name_plural = 'Позиции списков покупок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'ingredient'],
+                name='unique_shopping_list_item'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.user.username} - {self.ingredient}'
+
+
+class RecipeImport(models.Model):
+    """Позиция загрузки файла командой import_recipes.
+
+    Обновляется в одной транзакции с пачкой рецептов, поэтому после сбоя
+    загрузка продолжается ровно с первой незагруженной пачки.
+    """
+    path = models.CharField(
+        verbose_name='Файл',
+        max_length=500,
+        unique=True,
+    )
+    offset = models.PositiveBigIntegerField(
+        verbose_name='Позиция в файле',
+        default=0,
+    )
+    imported = models.PositiveIntegerField(
+        verbose_name='Загружено рецептов',
+        default=0,
+    )
+    updated_at = models.DateTimeField(
+        verbose_name='Обновлено',
+        auto_now=True,
+    )
+
+    class Meta:
+        verbose_name = 'Загрузка рецептов'
+        verbose_name_plural = 'Загрузки рецептов'
+
+    def __str__(self):
+        return f'{self.path}: {self.imported}'
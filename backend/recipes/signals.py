@@ -0,0 +1,35 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from recipes.cache import tag_cache
+from recipes.ingredient_index import ingredient_index
+from recipes.models import Ingredient, Recipe, ShoppingListItem, Tag
+from recipes.tasks import process_recipe_image
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def invalidate_ingredient_index(**kwargs):
+    ingredient_index.invalidate()
+
+
+@receiver((post_save, post_delete), sender=Tag)
+def invalidate_tag_cache(**kwargs):
+    tag_cache.invalidate()
+
+
+@receiver(post_save, sender=Recipe)
+def schedule_recipe_image(instance, **kwargs):
+    if (instance.image
+            and instance.image.name != instance.image_variants.get('source')):
+        process_recipe_image.enqueue(
+            instance.pk, key=f'recipe-image:{instance.pk}'
+        )
+
+
+@receiver(pre_delete, sender=Recipe)
+def remove_from_shopping_lists(instance, **kwargs):
+    """Вычитает рецепт из списков покупок при любом способе удаления.
+
+    pre_delete приходит до каскадного удаления корзин, пока по ним ещё
+    видно, у кого рецепт лежит в корзине.
+    """
+    ShoppingListItem.objects.remove_recipes([instance])
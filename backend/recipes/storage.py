@@ -0,0 +1,34 @@
+import os
+from hashlib import sha256
+from uuid import uuid4
+
+from django.core.files.storage import FileSystemStorage
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Хранилище, именующее файлы по SHA-256 их содержимого.
+
+    Одинаковые загрузки попадают в один файл. Повторная загрузка
+    обновляет время изменения файла, чтобы clean_media не удалил его,
+    пока новая ссылка на файл ещё не сохранена в базе.
+    """
+
+    def get_content_name(self, name, content):
+        digest = sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        directory = os.path.dirname(name)
+        extension = os.path.splitext(name)[1].lower()
+        return os.path.join(directory, digest.hexdigest() + extension)
+
+    def _save(self, name, content):
+        name = self.get_content_name(name, content)
+        if self.exists(name):
+            os.utime(self.path(name))
+            return name
+        # Файл пишется под временным именем и переименовывается: если
+        # то же содержимое загружают параллельно, файл заменится таким же,
+        # а не получит имя со случайным суффиксом.
+        temporary = super()._save(f'{name}.{uuid4().hex}.tmp', content)
+        os.replace(self.path(temporary), self.path(name))
+        return name
@@ -0,0 +1,7 @@
+from jobs.queue import task
+from recipes.images import generate_image_variants
+
+
+@task
+def process_recipe_image(recipe_id):
+    generate_image_variants(recipe_id)
@@ -0,0 +1,26 @@
+from api.tests.base import LOCMEM_CACHES
+from django.core.cache import cache, caches
+from django.test import SimpleTestCase, override_settings
+from recipes.cache import VersionedCache
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class VersionedCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.loads = 0
+        self.versioned = VersionedCache('test', self.load)
+        caches['versions'].clear()
+
+    def load(self):
+        self.loads += 1
+        return self.loads
+
+    def test_version_survives_default_cache_cull(self):
+        self.assertEqual(self.versioned.get(), 1)
+        cache.clear()
+        self.assertEqual(self.versioned.get(), 1)
+
+    def test_invalidate(self):
+        self.versioned.get()
+        self.versioned.invalidate()
+        self.assertEqual(self.versioned.get(), 2)
@@ -0,0 +1,35 @@
+import os
+import tempfile
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.test import SimpleTestCase
+from recipes.storage import ContentAddressedStorage
+
+
+class ContentAddressedStorageTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.storage = ContentAddressedStorage(location=directory.name)
+
+    def test_same_content_same_name(self):
+        first = self.storage.save('images/a.JPG', ContentFile(b'image'))
+        second = self.storage.save('images/b.jpg', ContentFile(b'image'))
+        self.assertEqual(first, second)
+        self.assertTrue(first.endswith('.jpg'))
+        self.assertEqual(self.storage.listdir('images')[1], [
+            os.path.basename(first)
+        ])
+
+    def test_concurrent_upload_keeps_content_name(self):
+        name = self.storage.save('images/a.jpg', ContentFile(b'image'))
+        # Параллельная загрузка уже записала файл после проверки exists().
+        with mock.patch.object(self.storage, 'exists', return_value=False):
+            self.assertEqual(
+                self.storage.save('images/b.jpg', ContentFile(b'image')),
+                name,
+            )
+        self.assertEqual(self.storage.listdir('images')[1], [
+            os.path.basename(name)
+        ])
@@ -0,0 +1,84 @@
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+from jobs.models import Job
+from recipes.management.commands.import_recipes import Command
+from recipes.models import (Ingredient, IngredientAmount, Recipe,
+                            RecipeImport, Tag)
+from users.models import User
+
+
+class RecipeTransferTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(
+            username='author', email='author@example.com',
+            first_name='Автор', last_name='Тестовый', password='Pass-1234'
+        )
+        tag = Tag.objects.create(name='Тег', color='#000000', slug='tag')
+        ingredient = Ingredient.objects.create(
+            name='ингредиент', measurement_unit='г'
+        )
+        for number in range(5):
+            recipe = Recipe.objects.create(
+                author=author, name=f'Рецепт {number}', text='Описание',
+                cooking_time=10, image=f'recipes/{number}.png',
+            )
+            recipe.tags.set([tag])
+            IngredientAmount.objects.create(
+                recipe=recipe, ingredient=ingredient, amount=number + 1
+            )
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'recipes.jsonl')
+        call_command('export_recipes', self.path, stdout=StringIO())
+        Recipe.objects.all().delete()
+        Job.objects.all().delete()
+
+    def import_recipes(self, **options):
+        call_command(
+            'import_recipes', self.path, batch_size=2,
+            stdout=StringIO(), **options
+        )
+
+    def test_round_trip(self):
+        self.import_recipes()
+        self.assertEqual(Recipe.objects.count(), 5)
+        self.assertEqual(
+            IngredientAmount.objects.filter(ingredient__name='ингредиент')
+            .count(), 5
+        )
+        self.assertFalse(RecipeImport.objects.exists())
+        self.assertEqual(
+            sorted(Job.objects.values_list('key', flat=True)),
+            sorted(f'recipe-image:{pk}'
+                   for pk in Recipe.objects.values_list('pk', flat=True)),
+        )
+
+    def test_resume_after_failed_batch(self):
+        import_batch = Command.import_batch
+        calls = []
+
+        def fail_second_batch(command, batch):
+            calls.append(batch)
+            import_batch(command, batch)
+            if len(calls) == 2:
+                raise RuntimeError
+
+        with mock.patch.object(Command, 'import_batch', fail_second_batch):
+            with self.assertRaises(RuntimeError):
+                self.import_recipes()
+        self.assertEqual(Recipe.objects.count(), 2)
+        self.assertEqual(RecipeImport.objects.get().imported, 2)
+        self.import_recipes()
+        self.assertEqual(Recipe.objects.count(), 5)
+        self.assertEqual(
+            sorted(Recipe.objects.values_list('name', flat=True)),
+            [f'Рецепт {number}' for number in range(5)],
+        )
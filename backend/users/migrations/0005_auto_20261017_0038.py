@@ -0,0 +1,21 @@
+# Generated by Django 3.2.25 on 2026-10-17 00:38
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_auto_20230915_0938'),
+    ]
+
+    operations = [
+        migrations.RenameModel(
+            old_name='Subscriptions',
+            new_name='Subscribe',
+        ),
+        migrations.RemoveConstraint(
+            model_name='subscribe',
+            name='Проверка самоподписки',
+        ),
+    ]